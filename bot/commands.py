@@ -1,46 +1,188 @@
 """Slash commands for the Discord Attendance Bot."""
 
+import asyncio
+import bisect
 import logging
+import time
 import discord
+from collections import OrderedDict
+from datetime import datetime, timezone
 from discord.ext import commands
 from discord import app_commands
-from typing import Optional, List
+from typing import Dict, Optional, List, Set, Tuple
 
 from .database import Database
-from .models import ClockInRequest, ClockOutRequest
+from .models import AttendanceType, ClockInRequest, ClockOutRequest, ClockStatus
 from .utils import (
     create_success_embed, 
     create_error_embed, 
     create_info_embed,
+    build_system_error,
+    DATABASE_ERROR,
+    embed_from_template,
+    NO_RECORDS_INFO,
+    NO_TYPES_INFO,
+    INFO_COLOR,
+    author_icon_url,
+    safe_command,
+    send_response,
+    user_cooldown,
+    validate_input,
+    run_in_background,
     format_attendance_record,
     validate_notes,
     truncate_text,
     get_week_start_end,
     group_records_by_date,
     format_date_japanese,
-    calculate_daily_work_hours,
     format_duration
 )
 
 logger = logging.getLogger(__name__)
 
+# How long the active attendance types are served from memory before re-querying
+ATTENDANCE_TYPES_CACHE_TTL = 60.0
+
+# How many Discord users' database IDs are remembered by the commands cog
+USER_ID_CACHE_SIZE = 1024
+
+# Minimum seconds between two invocations of the same command by one user
+COMMAND_COOLDOWN = 2.0
+
+# Attendance type commands allow short bursts: this many invocations per window
+TYPE_COMMAND_RATE = 3
+TYPE_COMMAND_WINDOW = 10.0
+
+# Formats and line templates for the weekly history embed
+DATE_FORMAT = '%Y年%m月%d日'
+TIME_FORMAT = '%H:%M'
+CLOCK_IN_LINE = "🟢 {} 出勤 ({})"
+CLOCK_OUT_LINE = "🔴 {} 退勤"
+
+def _check_attendance_type_input(type_name: str, description: Optional[str] = None) -> Optional[Tuple[str, str]]:
+    """Check the add-attendance-type arguments without touching Discord or the database."""
+    clean_type_name = type_name.strip() if type_name else ""
+    if not clean_type_name:
+        return "Invalid Input", "Attendance type name cannot be empty."
+    
+    if len(clean_type_name) > 50:
+        return "Invalid Input", "Attendance type name must be 50 characters or less."
+    
+    if description and len(description.strip()) > 200:
+        return "Invalid Input", "Description must be 200 characters or less."
+    
+    return None
+
 class AttendanceCommands(commands.Cog):
     """Attendance management commands."""
 
     def __init__(self, bot: commands.Bot, database: Database):
         self.bot = bot
         self.db = database
+        
+        # In-memory cache of attendance types (all of them, and the active subset)
+        self._all_types_cache: List[AttendanceType] = []
+        self._types_cache: Optional[List[AttendanceType]] = None
+        self._types_cache_ts = 0.0
+        self._types_cache_version = -1
+        self._types_by_id: Dict[int, str] = {}
+        self._types_by_name: Dict[str, int] = {}
+        self._types_index: List[Tuple[str, app_commands.Choice[str]]] = []
+        self._first_choices: List[app_commands.Choice[str]] = []
+        self._bigram_index: Dict[str, Set[int]] = {}
+        self._sorted_names: List[str] = []
+        self._sorted_positions: List[int] = []
+        self._types_lock = asyncio.Lock()
+        
+        # Database user IDs keyed by Discord ID, least recently used first
+        self._user_ids: OrderedDict[str, int] = OrderedDict()
+
+    def _types_cache_valid(self) -> bool:
+        """Check whether the attendance type cache can be served as-is.
+        
+        Writes through this process bump the database's version counter; the TTL
+        only bounds staleness from writes made by other processes.
+        """
+        return (
+            self._types_cache is not None
+            and self._types_cache_version == self.db.types_version
+            and time.monotonic() - self._types_cache_ts < ATTENDANCE_TYPES_CACHE_TTL
+        )
+
+    async def _get_types_cached(self) -> List[AttendanceType]:
+        """Get active attendance types, refreshing the cache when it has expired."""
+        if self._types_cache_valid():
+            return self._types_cache
+        
+        async with self._types_lock:
+            # Another task may have refreshed the cache while we were waiting
+            if self._types_cache_valid():
+                return self._types_cache
+            
+            # Read the version first so a write racing with the query forces another refresh
+            version = self.db.types_version
+            # One query serves both the active types and the full listing
+            all_types = await self.db.get_all_attendance_types()
+            attendance_types = [at for at in all_types if at.is_active]
+            self._types_by_id = {at.id: at.type_name for at in all_types if at.id is not None}
+            self._types_by_name = {at.type_name: at.id for at in attendance_types if at.id is not None}
+            self._types_index = [
+                (at.type_name.casefold(), app_commands.Choice(name=at.type_name, value=at.type_name))
+                for at in attendance_types
+            ]
+            self._first_choices = [choice for _, choice in self._types_index[:25]]  # Discord limit
+            # Map each two-character substring to the index positions containing it
+            bigram_index: Dict[str, Set[int]] = {}
+            for i, (folded_name, _) in enumerate(self._types_index):
+                for j in range(len(folded_name) - 1):
+                    bigram_index.setdefault(folded_name[j:j + 2], set()).add(i)
+            self._bigram_index = bigram_index
+            # Sorted case-folded names (with their index positions) for prefix lookups
+            sorted_entries = sorted((folded_name, i) for i, (folded_name, _) in enumerate(self._types_index))
+            self._sorted_names = [folded_name for folded_name, _ in sorted_entries]
+            self._sorted_positions = [i for _, i in sorted_entries]
+            self._all_types_cache = all_types
+            self._types_cache = attendance_types
+            self._types_cache_ts = time.monotonic()
+            self._types_cache_version = version
+            return attendance_types
+
+    async def _get_all_types_cached(self) -> List[AttendanceType]:
+        """Get all attendance types (including inactive) from the cache, sorted by name."""
+        await self._get_types_cached()
+        return self._all_types_cache
+
+    async def _require_user_id(self, interaction: discord.Interaction) -> Optional[int]:
+        """Get or create the invoking user's ID, replying with an error if that fails.
+        
+        User rows are never deleted and their IDs never change, so known users are
+        served from a bounded LRU cache without touching the database.
+        """
+        discord_id = str(interaction.user.id)
+        user_id = self._user_ids.get(discord_id)
+        if user_id is not None:
+            self._user_ids.move_to_end(discord_id)
+            return user_id
+        
+        user = await self.db.get_or_create_user(discord_id, interaction.user.display_name)
+        
+        if user.id is None:
+            embed = build_system_error(interaction.user, template=DATABASE_ERROR)
+            await send_response(interaction, embed=embed, ephemeral=True)
+            return None
+        
+        self._user_ids[discord_id] = user.id
+        if len(self._user_ids) > USER_ID_CACHE_SIZE:
+            self._user_ids.popitem(last=False)
+        return user.id
 
     async def get_attendance_type_choices(self) -> List[app_commands.Choice[str]]:
         """Get attendance type choices for command parameters."""
         try:
-            attendance_types = await self.db.get_attendance_types()
-            return [
-                app_commands.Choice(name=at.type_name, value=at.type_name)
-                for at in attendance_types[:25]  # Discord limit is 25 choices
-            ]
+            await self._get_types_cached()
+            return list(self._first_choices)
         except Exception as e:
-            logger.error(f"Error getting attendance types: {e}")
+            logger.error("Error getting attendance types: %s", e)
             return [app_commands.Choice(name="Regular Work", value="Regular Work")]
 
     @app_commands.command(name="clock-in", description="Record your clock-in time")
@@ -48,6 +190,8 @@ class AttendanceCommands(commands.Cog):
         attendance_type="Type of work you're starting",
         notes="Optional notes about your work session"
     )
+    @user_cooldown(COMMAND_COOLDOWN)
+    @safe_command(error_message="An error occurred while processing your clock-in. Please try again.")
     async def clock_in(
         self,
         interaction: discord.Interaction,
@@ -55,67 +199,47 @@ class AttendanceCommands(commands.Cog):
         notes: Optional[str] = None
     ):
         """Handle clock-in command."""
-        await interaction.response.defer()
+        # Validate and clean notes
+        clean_notes = validate_notes(notes)
         
-        try:
-            # Validate and clean notes
-            clean_notes = validate_notes(notes)
-            
-            # Get or create user
-            user = await self.db.get_or_create_user(
-                str(interaction.user.id),
-                interaction.user.display_name
-            )
-            
-            # Check if user can clock in
-            if user.id is None:
-                embed = create_error_embed("Database Error", "Failed to create user record.", interaction.user)
-                await interaction.followup.send(embed=embed, ephemeral=True)
-                return
-                
-            can_clock_in, reason = await self.db.can_clock_in(user.id)
-            if not can_clock_in:
-                embed = create_error_embed("Cannot Clock In", reason, interaction.user)
-                await interaction.followup.send(embed=embed, ephemeral=True)
-                return
-            
-            # Get attendance type
-            attendance_type_obj = await self.db.get_attendance_type_by_name(attendance_type)
-            if not attendance_type_obj:
-                embed = create_error_embed(
-                    "Invalid Attendance Type",
-                    f"Attendance type '{attendance_type}' not found.",
-                    interaction.user
-                )
-                await interaction.followup.send(embed=embed, ephemeral=True)
-                return
-            
-            # Create attendance record
-            record = await self.db.create_attendance_record(
-                user.id,
-                "clock_in",
-                attendance_type_obj.id,
-                clean_notes
-            )
-            
-            # Create success message
-            description = f"Successfully clocked in for **{attendance_type}**"
-            if clean_notes:
-                description += f"\n📝 Notes: {clean_notes}"
-            
-            embed = create_success_embed("Clocked In", description, interaction.user)
-            await interaction.followup.send(embed=embed)
-            
-            logger.info(f"User {interaction.user.display_name} clocked in for {attendance_type}")
-            
-        except Exception as e:
-            logger.error(f"Error in clock_in command: {e}")
-            embed = create_error_embed(
-                "System Error",
-                "An error occurred while processing your clock-in. Please try again.",
-                interaction.user
-            )
-            await interaction.followup.send(embed=embed, ephemeral=True)
+        # Resolve the type from a warm cache; otherwise the transaction looks it up by
+        # name rather than waiting on a cache refresh before it can start
+        attendance_type_id = self._types_by_name.get(attendance_type) if self._types_cache_valid() else None
+        
+        # Register the user, validate and record the clock-in in one transaction
+        result = await self.db.clock_in_tx(
+            str(interaction.user.id),
+            interaction.user.display_name,
+            attendance_type,
+            clean_notes,
+            attendance_type_id
+        )
+        
+        if result.status == ClockStatus.ALREADY_IN:
+            embed = create_error_embed("Cannot Clock In", result.reason, interaction.user)
+            await send_response(interaction, embed=embed, ephemeral=True)
+            return
+        
+        if result.status == ClockStatus.UNKNOWN_TYPE:
+            embed = create_error_embed("Invalid Attendance Type", result.reason, interaction.user)
+            await send_response(interaction, embed=embed, ephemeral=True)
+            return
+        
+        # Create success message
+        description = f"Successfully clocked in for **{attendance_type}**"
+        if clean_notes:
+            description += f"\n📝 Notes: {clean_notes}"
+        
+        # Stamp the embed with the stored record time (SQLite keeps it as naive UTC)
+        embed = create_success_embed(
+            "Clocked In",
+            description,
+            interaction.user,
+            timestamp=result.record.timestamp.replace(tzinfo=timezone.utc)
+        )
+        await send_response(interaction, embed=embed)
+        
+        logger.info("User %s clocked in for %s", interaction.user.display_name, attendance_type)
 
     @clock_in.autocomplete('attendance_type')
     async def attendance_type_autocomplete(
@@ -125,182 +249,152 @@ class AttendanceCommands(commands.Cog):
     ) -> List[app_commands.Choice[str]]:
         """Provide autocomplete for attendance types."""
         try:
-            attendance_types = await self.db.get_attendance_types()
-            choices = []
-            
-            for at in attendance_types:
-                if current.lower() in at.type_name.lower():
-                    choices.append(app_commands.Choice(name=at.type_name, value=at.type_name))
-                
-                if len(choices) >= 25:  # Discord limit
-                    break
+            await self._get_types_cached()
+            current_folded = current.casefold()
+            
+            # Nothing typed yet: every name matches
+            if not current_folded:
+                return self._first_choices
+            
+            # Names starting with the input are listed first, found by binary search
+            lo = bisect.bisect_left(self._sorted_names, current_folded)
+            hi = bisect.bisect_left(self._sorted_names, current_folded + "\U0010ffff")
+            prefix_positions = self._sorted_positions[lo:hi]
+            choices = [self._types_index[i][1] for i in prefix_positions[:25]]  # Discord limit
+            if len(choices) >= 25:
+                return choices
+            
+            if len(current_folded) >= 2:
+                # Only names containing every bigram of the input can match
+                candidates: Optional[Set[int]] = None
+                for j in range(len(current_folded) - 1):
+                    bigram_positions = self._bigram_index.get(current_folded[j:j + 2], set())
+                    candidates = bigram_positions if candidates is None else candidates & bigram_positions
+                    if not candidates:
+                        return choices
+                positions = sorted(candidates)
+            else:
+                positions = range(len(self._types_index))
+            
+            # Then fill up with names containing the input elsewhere
+            seen = set(prefix_positions)
+            for i in positions:
+                folded_name, choice = self._types_index[i]
+                if i not in seen and current_folded in folded_name:
+                    choices.append(choice)
+                    if len(choices) >= 25:  # Discord limit
+                        break
             
             return choices
         except Exception as e:
-            logger.error(f"Error in attendance_type_autocomplete: {e}")
+            logger.error("Error in attendance_type_autocomplete: %s", e)
             return [app_commands.Choice(name="Regular Work", value="Regular Work")]
 
     @app_commands.command(name="clock-out", description="Record your clock-out time")
     @app_commands.describe(notes="Optional notes about your work session")
+    @user_cooldown(COMMAND_COOLDOWN)
+    @safe_command(error_message="An error occurred while processing your clock-out. Please try again.")
     async def clock_out(
         self,
         interaction: discord.Interaction,
         notes: Optional[str] = None
     ):
         """Handle clock-out command."""
-        await interaction.response.defer()
+        # Validate and clean notes
+        clean_notes = validate_notes(notes)
         
-        try:
-            # Validate and clean notes
-            clean_notes = validate_notes(notes)
-            
-            # Get or create user
-            user = await self.db.get_or_create_user(
-                str(interaction.user.id),
-                interaction.user.display_name
-            )
-            
-            # Check if user can clock out
-            if user.id is None:
-                embed = create_error_embed("Database Error", "Failed to create user record.", interaction.user)
-                await interaction.followup.send(embed=embed, ephemeral=True)
-                return
-                
-            can_clock_out, reason = await self.db.can_clock_out(user.id)
-            if not can_clock_out:
-                embed = create_error_embed("Cannot Clock Out", reason, interaction.user)
-                await interaction.followup.send(embed=embed, ephemeral=True)
-                return
-            
-            # Create attendance record
-            record = await self.db.create_attendance_record(
-                user.id,
-                "clock_out",
-                None,  # Clock-out doesn't need attendance type
-                clean_notes
-            )
-            
-            # Create success message
-            description = "Successfully clocked out"
-            if clean_notes:
-                description += f"\n📝 Notes: {clean_notes}"
-            
-            embed = create_success_embed("Clocked Out", description, interaction.user)
-            await interaction.followup.send(embed=embed)
-            
-            logger.info(f"User {interaction.user.display_name} clocked out")
-            
-        except Exception as e:
-            logger.error(f"Error in clock_out command: {e}")
-            embed = create_error_embed(
-                "System Error",
-                "An error occurred while processing your clock-out. Please try again.",
-                interaction.user
-            )
-            await interaction.followup.send(embed=embed, ephemeral=True)
+        # Register the user, validate and record the clock-out in one transaction
+        result = await self.db.clock_out_tx(
+            str(interaction.user.id),
+            interaction.user.display_name,
+            clean_notes
+        )
+        
+        if result.status == ClockStatus.NOT_IN:
+            embed = create_error_embed("Cannot Clock Out", result.reason, interaction.user)
+            await send_response(interaction, embed=embed, ephemeral=True)
+            return
+        
+        # Create success message
+        description = "Successfully clocked out"
+        if clean_notes:
+            description += f"\n📝 Notes: {clean_notes}"
+        
+        embed = create_success_embed(
+            "Clocked Out",
+            description,
+            interaction.user,
+            timestamp=result.record.timestamp.replace(tzinfo=timezone.utc)
+        )
+        await send_response(interaction, embed=embed)
+        
+        logger.info("User %s clocked out", interaction.user.display_name)
 
     @app_commands.command(name="my-summary", description="View your attendance summary")
+    @user_cooldown(COMMAND_COOLDOWN)
+    @safe_command(ephemeral=True, error_message="An error occurred while retrieving your summary. Please try again.")
     async def my_summary(self, interaction: discord.Interaction):
         """Show user's attendance summary."""
-        await interaction.response.defer()
+        user_id = await self._require_user_id(interaction)
+        if user_id is None:
+            return
         
-        try:
-            # Get or create user
-            user = await self.db.get_or_create_user(
-                str(interaction.user.id),
-                interaction.user.display_name
-            )
-            
-            # Check if user creation was successful
-            if user.id is None:
-                embed = create_error_embed("Database Error", "Failed to create user record.", interaction.user)
-                await interaction.followup.send(embed=embed, ephemeral=True)
-                return
-            
-            # Get attendance summary
-            summary = await self.db.get_user_attendance_summary(user.id)
-            if not summary:
-                embed = create_info_embed(
-                    "No Attendance Records",
-                    "You haven't recorded any attendance yet. Use `/clock-in` to get started!",
-                    interaction.user
-                )
-                await interaction.followup.send(embed=embed, ephemeral=True)
-                return
-            
-            # Get recent records
-            recent_records = await self.db.get_user_records(user.id, limit=5)
-            
-            # Create summary embed
-            embed = discord.Embed(
-                title="📊 Your Attendance Summary",
-                color=discord.Color.blue(),
-                timestamp=discord.utils.utcnow()
-            )
-            embed.set_author(
-                name=interaction.user.display_name,
-                icon_url=interaction.user.avatar.url if interaction.user.avatar else None
-            )
-            
-            # Add summary fields
-            embed.add_field(
-                name="Total Records",
-                value=str(summary.total_records),
-                inline=True
-            )
-            
-            status = "🟢 Clocked In" if summary.is_currently_clocked_in else "🔴 Clocked Out"
+        # Get attendance summary and recent records (with type names) in one round trip
+        summary, recent_records = await self.db.get_summary_with_recent_records(user_id, limit=5)
+        if not summary:
+            embed = embed_from_template(NO_RECORDS_INFO, interaction.user)
+            await send_response(interaction, embed=embed, ephemeral=True)
+            return
+        
+        # Create summary embed
+        embed = discord.Embed(
+            title="📊 Your Attendance Summary",
+            color=INFO_COLOR,
+            timestamp=discord.utils.utcnow()
+        )
+        embed.set_author(
+            name=interaction.user.display_name,
+            icon_url=author_icon_url(interaction.user)
+        )
+        
+        # Add summary fields
+        embed.add_field(
+            name="Total Records",
+            value=str(summary.total_records),
+            inline=True
+        )
+        
+        status = "🟢 Clocked In" if summary.is_currently_clocked_in else "🔴 Clocked Out"
+        embed.add_field(
+            name="Current Status",
+            value=status,
+            inline=True
+        )
+        
+        embed.add_field(name="\u200b", value="\u200b", inline=True)  # Empty field for spacing
+        
+        # Recent activity
+        if recent_records:
+            activity_text = "\n\n".join([
+                format_attendance_record(record, attendance_type_name)
+                for record, attendance_type_name in recent_records
+            ])
             embed.add_field(
-                name="Current Status",
-                value=status,
-                inline=True
+                name="Recent Activity",
+                value=truncate_text(activity_text, 1000),
+                inline=False
             )
-            
-            embed.add_field(name="\u200b", value="\u200b", inline=True)  # Empty field for spacing
-            
-            # Recent activity
-            if recent_records:
-                recent_activity = []
-                for record in recent_records:
-                    # Get attendance type name if it's a clock-in
-                    attendance_type_name = None
-                    if record.attendance_type_id:
-                        try:
-                            # This is a simplified approach - in production you might want to cache this
-                            attendance_types = await self.db.get_attendance_types()
-                            for at in attendance_types:
-                                if at.id == record.attendance_type_id:
-                                    attendance_type_name = at.type_name
-                                    break
-                        except Exception:
-                            pass
-                    
-                    formatted_record = format_attendance_record(record, attendance_type_name)
-                    recent_activity.append(formatted_record)
-                
-                activity_text = "\n\n".join(recent_activity)
-                embed.add_field(
-                    name="Recent Activity",
-                    value=truncate_text(activity_text, 1000),
-                    inline=False
-                )
-            
-            await interaction.followup.send(embed=embed, ephemeral=True)
-            
-        except Exception as e:
-            logger.error(f"Error in my_summary command: {e}")
-            embed = create_error_embed(
-                "System Error",
-                "An error occurred while retrieving your summary. Please try again.",
-                interaction.user
-            )
-            await interaction.followup.send(embed=embed, ephemeral=True)
+        
+        await send_response(interaction, embed=embed, ephemeral=True)
 
     @app_commands.command(name="add-attendance-type", description="Add a new attendance type")
     @app_commands.describe(
         type_name="Name of the new attendance type",
         description="Optional description for the attendance type"
     )
+    @user_cooldown(TYPE_COMMAND_WINDOW, rate=TYPE_COMMAND_RATE)
+    @validate_input(_check_attendance_type_input)
+    @safe_command(error_message="An error occurred while adding the attendance type. Please try again.")
     async def add_attendance_type(
         self,
         interaction: discord.Interaction,
@@ -308,206 +402,126 @@ class AttendanceCommands(commands.Cog):
         description: Optional[str] = None
     ):
         """Add a new attendance type."""
-        await interaction.response.defer()
+        # Input was already validated before the command started
+        clean_type_name = type_name.strip()
+        clean_description = description.strip() if description else ""
         
-        try:
-            # Validate type_name
-            if not type_name or len(type_name.strip()) == 0:
-                embed = create_error_embed(
-                    "Invalid Input",
-                    "Attendance type name cannot be empty.",
-                    interaction.user
-                )
-                await interaction.followup.send(embed=embed, ephemeral=True)
-                return
-            
-            # Clean and validate inputs
-            clean_type_name = type_name.strip()
-            clean_description = description.strip() if description else ""
-            
-            # Check length limits
-            if len(clean_type_name) > 50:
-                embed = create_error_embed(
-                    "Invalid Input",
-                    "Attendance type name must be 50 characters or less.",
-                    interaction.user
-                )
-                await interaction.followup.send(embed=embed, ephemeral=True)
-                return
-            
-            if len(clean_description) > 200:
-                embed = create_error_embed(
-                    "Invalid Input",
-                    "Description must be 200 characters or less.",
-                    interaction.user
-                )
-                await interaction.followup.send(embed=embed, ephemeral=True)
-                return
-            
-            # Check if attendance type already exists
-            if await self.db.attendance_type_exists(clean_type_name):
-                embed = create_error_embed(
-                    "Duplicate Entry",
-                    f"Attendance type '{clean_type_name}' already exists.",
-                    interaction.user
-                )
-                await interaction.followup.send(embed=embed, ephemeral=True)
-                return
-            
-            # Create new attendance type
-            new_type = await self.db.create_attendance_type(clean_type_name, clean_description)
-            
-            # Create success message
-            description_text = f"Successfully added attendance type **{new_type.type_name}**"
-            if new_type.description:
-                description_text += f"\n📝 Description: {new_type.description}"
-            
-            embed = create_success_embed("Attendance Type Added", description_text, interaction.user)
-            await interaction.followup.send(embed=embed)
-            
-            logger.info(f"User {interaction.user.display_name} added attendance type: {new_type.type_name}")
-            
-        except Exception as e:
-            logger.error(f"Error in add_attendance_type command: {e}")
+        # Check if attendance type already exists
+        if await self.db.attendance_type_exists(clean_type_name):
             embed = create_error_embed(
-                "System Error",
-                "An error occurred while adding the attendance type. Please try again.",
+                "Duplicate Entry",
+                f"Attendance type '{clean_type_name}' already exists.",
                 interaction.user
             )
-            await interaction.followup.send(embed=embed, ephemeral=True)
+            await send_response(interaction, embed=embed, ephemeral=True)
+            return
+        
+        # Create new attendance type
+        new_type = await self.db.create_attendance_type(clean_type_name, clean_description)
+        
+        # Create success message
+        description_text = f"Successfully added attendance type **{new_type.type_name}**"
+        if new_type.description:
+            description_text += f"\n📝 Description: {new_type.description}"
+        
+        embed = create_success_embed("Attendance Type Added", description_text, interaction.user)
+        await send_response(interaction, embed=embed)
+        
+        # Rebuild the type cache after replying so the next autocomplete does not wait on it
+        run_in_background(self._get_types_cached(), "refresh attendance type cache")
+        
+        logger.info("User %s added attendance type: %s", interaction.user.display_name, new_type.type_name)
 
     @app_commands.command(name="list-attendance-types", description="List all attendance types")
+    @user_cooldown(TYPE_COMMAND_WINDOW, rate=TYPE_COMMAND_RATE)
+    @safe_command(ephemeral=True, error_message="An error occurred while retrieving attendance types. Please try again.")
     async def list_attendance_types(self, interaction: discord.Interaction):
         """List all attendance types."""
-        await interaction.response.defer()
+        # Get all attendance types
+        all_types = await self._get_all_types_cached()
         
-        try:
-            # Get all attendance types
-            all_types = await self.db.get_all_attendance_types()
-            
-            if not all_types:
-                embed = create_info_embed(
-                    "No Attendance Types",
-                    "No attendance types found in the system.",
-                    interaction.user
-                )
-                await interaction.followup.send(embed=embed, ephemeral=True)
-                return
-            
-            # Separate active and inactive types
-            active_types = [at for at in all_types if at.is_active]
-            inactive_types = [at for at in all_types if not at.is_active]
+        if not all_types:
+            embed = embed_from_template(NO_TYPES_INFO, interaction.user)
+            await send_response(interaction, embed=embed, ephemeral=True)
+            return
+        
+        # Separate active and inactive types
+        active_types = [at for at in all_types if at.is_active]
+        inactive_types = [at for at in all_types if not at.is_active]
+        
+        # Create embed
+        embed = discord.Embed(
+            title="📋 Attendance Types",
+            color=INFO_COLOR,
+            timestamp=discord.utils.utcnow()
+        )
+        embed.set_author(
+            name=interaction.user.display_name,
+            icon_url=author_icon_url(interaction.user)
+        )
+        
+        # Add active types
+        if active_types:
+            active_list = [
+                f"**{at.type_name}**" + (f"\n  ├ {at.description}" if at.description else "")
+                for at in active_types
+            ]
             
-            # Create embed
-            embed = discord.Embed(
-                title="📋 Attendance Types",
-                color=discord.Color.blue(),
-                timestamp=discord.utils.utcnow()
-            )
-            embed.set_author(
-                name=interaction.user.display_name,
-                icon_url=interaction.user.avatar.url if interaction.user.avatar else None
+            embed.add_field(
+                name="🟢 Active Types",
+                value="\n\n".join(active_list),
+                inline=False
             )
+        
+        # Add inactive types if any
+        if inactive_types:
+            inactive_list = [
+                f"~~{at.type_name}~~" + (f"\n  ├ ~~{at.description}~~" if at.description else "")
+                for at in inactive_types
+            ]
             
-            # Add active types
-            if active_types:
-                active_list = []
-                for at in active_types:
-                    type_text = f"**{at.type_name}**"
-                    if at.description:
-                        type_text += f"\n  ├ {at.description}"
-                    active_list.append(type_text)
-                
-                embed.add_field(
-                    name="🟢 Active Types",
-                    value="\n\n".join(active_list),
-                    inline=False
-                )
-            
-            # Add inactive types if any
-            if inactive_types:
-                inactive_list = []
-                for at in inactive_types:
-                    type_text = f"~~{at.type_name}~~"
-                    if at.description:
-                        type_text += f"\n  ├ ~~{at.description}~~"
-                    inactive_list.append(type_text)
-                
-                embed.add_field(
-                    name="🔴 Inactive Types",
-                    value="\n\n".join(inactive_list),
-                    inline=False
-                )
-            
-            # Add footer with count
-            total_count = len(all_types)
-            active_count = len(active_types)
-            embed.set_footer(text=f"Total: {total_count} types ({active_count} active)")
-            
-            await interaction.followup.send(embed=embed, ephemeral=True)
-            
-        except Exception as e:
-            logger.error(f"Error in list_attendance_types command: {e}")
-            embed = create_error_embed(
-                "System Error",
-                "An error occurred while retrieving attendance types. Please try again.",
-                interaction.user
+            embed.add_field(
+                name="🔴 Inactive Types",
+                value="\n\n".join(inactive_list),
+                inline=False
             )
-            await interaction.followup.send(embed=embed, ephemeral=True)
+        
+        # Add footer with count
+        total_count = len(all_types)
+        active_count = len(active_types)
+        embed.set_footer(text=f"Total: {total_count} types ({active_count} active)")
+        
+        await send_response(interaction, embed=embed, ephemeral=True)
 
     @app_commands.command(name="this-week", description="View your attendance for this week")
+    @user_cooldown(COMMAND_COOLDOWN)
+    @safe_command(ephemeral=True, error_message="An error occurred while retrieving this week's attendance. Please try again.")
     async def this_week(self, interaction: discord.Interaction):
         """Show user's attendance for the current week."""
-        await interaction.response.defer()
-        
-        try:
-            await self._show_weekly_attendance(interaction, weeks_offset=0, week_name="今週")
-        except Exception as e:
-            logger.error(f"Error in this_week command: {e}")
-            embed = create_error_embed(
-                "System Error",
-                "An error occurred while retrieving this week's attendance. Please try again.",
-                interaction.user
-            )
-            await interaction.followup.send(embed=embed, ephemeral=True)
+        await self._show_weekly_attendance(interaction, weeks_offset=0, week_name="今週")
 
     @app_commands.command(name="last-week", description="View your attendance for last week")
+    @user_cooldown(COMMAND_COOLDOWN)
+    @safe_command(ephemeral=True, error_message="An error occurred while retrieving last week's attendance. Please try again.")
     async def last_week(self, interaction: discord.Interaction):
         """Show user's attendance for the previous week."""
-        await interaction.response.defer()
-        
-        try:
-            await self._show_weekly_attendance(interaction, weeks_offset=-1, week_name="先週")
-        except Exception as e:
-            logger.error(f"Error in last_week command: {e}")
-            embed = create_error_embed(
-                "System Error",
-                "An error occurred while retrieving last week's attendance. Please try again.",
-                interaction.user
-            )
-            await interaction.followup.send(embed=embed, ephemeral=True)
+        await self._show_weekly_attendance(interaction, weeks_offset=-1, week_name="先週")
 
     async def _show_weekly_attendance(self, interaction: discord.Interaction, weeks_offset: int, week_name: str):
         """Helper method to show weekly attendance."""
-        from datetime import datetime, timedelta
-        
-        # Get or create user
-        user = await self.db.get_or_create_user(
-            str(interaction.user.id),
-            interaction.user.display_name
-        )
-        
-        if user.id is None:
-            embed = create_error_embed("Database Error", "Failed to create user record.", interaction.user)
-            await interaction.followup.send(embed=embed, ephemeral=True)
+        user_id = await self._require_user_id(interaction)
+        if user_id is None:
             return
         
         # Calculate week start and end
         now = datetime.now()
         week_start, week_end = get_week_start_end(now, weeks_offset)
         
-        # Get records for the week
-        records = await self.db.get_user_records_by_week(user.id, week_start, week_end)
+        # Read the week's records and aggregates from one snapshot while the type names refresh
+        (records, daily_seconds, type_counts), _ = await asyncio.gather(
+            self.db.get_weekly_records_with_aggregates(user_id, week_start, week_end),
+            self._get_types_cached()
+        )
         
         if not records:
             embed = create_info_embed(
@@ -515,85 +529,84 @@ class AttendanceCommands(commands.Cog):
                 f"{week_name}の出勤記録がありません。",
                 interaction.user
             )
-            await interaction.followup.send(embed=embed, ephemeral=True)
+            await send_response(interaction, embed=embed, ephemeral=True)
             return
         
-        # Group records by date
+        # Group records by date; hours and type counts were aggregated in SQL
         grouped_records = group_records_by_date(records)
         
         # Get attendance types for display
-        attendance_types = await self.db.get_attendance_types()
-        type_map = {at.id: at.type_name for at in attendance_types}
+        type_map = dict(self._types_by_id)
+        
+        # Types created by another process since the last refresh are not cached yet
+        missing_type_ids = {
+            record.attendance_type_id for record in records
+            if record.attendance_type_id and record.attendance_type_id not in type_map
+        }
+        if missing_type_ids:
+            type_map.update(await self.db.get_attendance_type_names(list(missing_type_ids)))
         
         # Create embed
         embed = discord.Embed(
             title=f"📅 {week_name}の履歴",
-            description=f"{week_start.strftime('%Y年%m月%d日')} ～ {week_end.strftime('%Y年%m月%d日')}",
-            color=discord.Color.blue(),
+            description=f"{week_start.strftime(DATE_FORMAT)} ～ {week_end.strftime(DATE_FORMAT)}",
+            color=INFO_COLOR,
             timestamp=discord.utils.utcnow()
         )
         embed.set_author(
             name=interaction.user.display_name,
-            icon_url=interaction.user.avatar.url if interaction.user.avatar else None
+            icon_url=author_icon_url(interaction.user)
         )
         
         # Process each day
-        total_work_hours = 0.0
+        total_work_seconds = 0
         work_days = 0
         incomplete_sessions = []
         attendance_type_count = {}
+        for type_id, count in type_counts.items():
+            type_name = type_map.get(type_id, "Unknown")
+            attendance_type_count[type_name] = attendance_type_count.get(type_name, 0) + count
         
-        for current_date in [week_start.date() + timedelta(days=i) for i in range(7)]:
-            day_records = grouped_records.get(current_date, [])
+        # Grouping keeps the chronological order, so days come out Monday first
+        for current_date, day_records in grouped_records.items():
+            work_days += 1
+            day_seconds, has_incomplete = daily_seconds.get(current_date, (0, False))
+            total_work_seconds += day_seconds
+            
+            if has_incomplete:
+                incomplete_sessions.append(current_date)
+            
+            # Format daily summary
+            day_lines = []
+            for record in day_records:
+                time_str = record.timestamp.strftime(TIME_FORMAT)
+                if record.record_type == "clock_in":
+                    day_lines.append(CLOCK_IN_LINE.format(time_str, type_map.get(record.attendance_type_id, "")))
+                else:
+                    day_lines.append(CLOCK_OUT_LINE.format(time_str))
+            
+            if day_seconds > 0:
+                day_lines.append(f"⏰ 勤務時間: {format_duration(day_seconds)}")
+            
+            if has_incomplete:
+                day_lines.append("⚠️ 未完了セッション")
             
-            if day_records:
-                work_days += 1
-                day_hours, has_incomplete = calculate_daily_work_hours(day_records)
-                total_work_hours += day_hours
-                
-                if has_incomplete:
-                    incomplete_sessions.append(current_date)
-                
-                # Count attendance types
-                for record in day_records:
-                    if record.record_type == "clock_in" and record.attendance_type_id:
-                        type_name = type_map.get(record.attendance_type_id, "Unknown")
-                        attendance_type_count[type_name] = attendance_type_count.get(type_name, 0) + 1
-                
-                # Format daily summary
-                day_text = []
-                sorted_day_records = sorted(day_records, key=lambda r: r.timestamp or datetime.min)
-                
-                for record in sorted_day_records:
-                    if record.timestamp:
-                        time_str = record.timestamp.strftime('%H:%M')
-                        if record.record_type == "clock_in":
-                            type_name = type_map.get(record.attendance_type_id, "")
-                            day_text.append(f"🟢 {time_str} 出勤 ({type_name})")
-                        else:
-                            day_text.append(f"🔴 {time_str} 退勤")
-                
-                if day_hours > 0:
-                    day_text.append(f"⏰ 勤務時間: {format_duration(day_hours)}")
-                
-                if has_incomplete:
-                    day_text.append("⚠️ 未完了セッション")
-                
-                embed.add_field(
-                    name=format_date_japanese(current_date),
-                    value="\n".join(day_text) if day_text else "記録なし",
-                    inline=False
-                )
+            embed.add_field(
+                name=format_date_japanese(current_date),
+                value="\n".join(day_lines),
+                inline=False
+            )
         
         # Add weekly summary
-        summary_parts = []
-        summary_parts.append(f"📊 **週間統計**")
-        summary_parts.append(f"総勤務時間: {format_duration(total_work_hours)}")
-        summary_parts.append(f"出勤日数: {work_days}日")
+        summary_parts = [
+            "📊 **週間統計**",
+            f"総勤務時間: {format_duration(total_work_seconds)}",
+            f"出勤日数: {work_days}日",
+        ]
         
         if work_days > 0:
-            avg_hours = total_work_hours / work_days
-            summary_parts.append(f"平均勤務時間: {format_duration(avg_hours)}")
+            avg_seconds = total_work_seconds // work_days
+            summary_parts.append(f"平均勤務時間: {format_duration(avg_seconds)}")
         
         if attendance_type_count:
             most_used = max(attendance_type_count.items(), key=lambda x: x[1])
@@ -608,7 +621,7 @@ class AttendanceCommands(commands.Cog):
             inline=False
         )
         
-        await interaction.followup.send(embed=embed, ephemeral=True)
+        await send_response(interaction, embed=embed, ephemeral=True)
 
 async def setup(bot: commands.Bot, database: Database):
     """Set up the commands cog."""
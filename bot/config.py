@@ -1,35 +1,44 @@
 """Configuration management for the Discord Attendance Bot."""
 
 import os
+import atexit
 import logging
+import queue
+from logging.handlers import QueueHandler, QueueListener
 from typing import Optional
 from dotenv import load_dotenv
 
 # Load environment variables
 load_dotenv()
 
+def _parse_guild_id(guild_id: Optional[str]) -> Optional[int]:
+    """Parse the guild ID environment value, ignoring blank or non-numeric values."""
+    if guild_id and guild_id.strip().isdigit():
+        return int(guild_id.strip())
+    return None
+
 class Config:
-    """Configuration settings for the bot."""
+    """Configuration settings for the bot.
+    
+    Every value is read from the environment once, when this module is imported.
+    """
     
     # Discord Configuration
     DISCORD_TOKEN: str = os.getenv("DISCORD_TOKEN", "")
-    GUILD_ID: Optional[int] = None
-    
-    @classmethod
-    def _get_guild_id(cls) -> Optional[int]:
-        """Get guild ID from environment variable."""
-        guild_id = os.getenv("GUILD_ID")
-        if guild_id and guild_id.strip() and guild_id.strip().isdigit():
-            return int(guild_id.strip())
-        return None
+    GUILD_ID: Optional[int] = _parse_guild_id(os.getenv("GUILD_ID"))
     
     # SQLite Database Configuration
     DATABASE_PATH: str = os.getenv("DATABASE_PATH", "attendance.db")
+    DATABASE_POOL_SIZE: int = int(os.getenv("DATABASE_POOL_SIZE", "5"))
+    DATABASE_POOL_MIN_SIZE: int = int(os.getenv("DATABASE_POOL_MIN_SIZE", "2"))
     
     # Application Settings
     DEBUG: bool = os.getenv("DEBUG", "False").lower() == "true"
     LOG_LEVEL: str = os.getenv("LOG_LEVEL", "INFO").upper()
     
+    # Listener started by setup_logging(); set once logging is configured
+    _log_listener: Optional[QueueListener] = None
+    
     @classmethod
     def validate(cls) -> None:
         """Validate required configuration values."""
@@ -43,12 +52,30 @@ class Config:
     
     @classmethod
     def setup_logging(cls) -> None:
-        """Set up logging configuration."""
-        logging.basicConfig(
-            level=getattr(logging, cls.LOG_LEVEL),
-            format='%(asctime)s - %(name)s - %(levelname)s - %(message)s',
-            handlers=[
-                logging.StreamHandler(),
-                logging.FileHandler('bot.log')
-            ]
-        )
+        """Set up logging configuration.
+        
+        Records are only enqueued on the calling thread; a background listener
+        does the console and file I/O so logging never blocks the event loop.
+        Only the first call configures anything; later calls are no-ops.
+        """
+        if cls._log_listener is not None:
+            return
+        
+        formatter = logging.Formatter('%(asctime)s - %(name)s - %(levelname)s - %(message)s')
+        handlers = [
+            logging.StreamHandler(),
+            logging.FileHandler('bot.log')
+        ]
+        for handler in handlers:
+            handler.setFormatter(formatter)
+        
+        log_queue: queue.SimpleQueue = queue.SimpleQueue()
+        listener = QueueListener(log_queue, *handlers, respect_handler_level=True)
+        listener.start()
+        cls._log_listener = listener
+        # Flush anything still queued when the process exits
+        atexit.register(listener.stop)
+        
+        root_logger = logging.getLogger()
+        root_logger.setLevel(getattr(logging, cls.LOG_LEVEL))
+        root_logger.addHandler(QueueHandler(log_queue))
@@ -1,73 +1,279 @@
 """Database operations for the Discord Attendance Bot."""
 
+import asyncio
 import logging
+import sqlite3
+import time
 import aiosqlite
-from datetime import datetime
-from typing import List, Optional, Tuple
-from .models import User, AttendanceType, AttendanceRecord, AttendanceSummary
+from contextlib import asynccontextmanager
+from datetime import date, datetime
+from typing import AsyncIterator, Dict, List, Optional, Tuple
+from .models import User, AttendanceType, AttendanceRecord, AttendanceSummary, ClockStatus, ClockInResult, ClockOutResult
 from .config import Config
 
 logger = logging.getLogger(__name__)
 
+# Compiled statements kept per connection; every query here is a fixed SQL string,
+# so repeated commands reuse the parsed statement instead of re-preparing it
+STATEMENT_CACHE_SIZE = 256
+
+# Rows per multi-row INSERT; keeps each generated statement, its bound parameters
+# and the RETURNING result set small however large a batch the caller passes
+BULK_INSERT_ROWS = 200
+
+# Tables and indexes, created in one transaction when the database is opened
+SCHEMA_SQL = """
+BEGIN;
+
+CREATE TABLE IF NOT EXISTS users (
+    id INTEGER PRIMARY KEY,
+    discord_id TEXT UNIQUE NOT NULL,
+    username TEXT NOT NULL,
+    created_at DATETIME DEFAULT CURRENT_TIMESTAMP,
+    current_state TEXT CHECK(current_state IN ('in', 'out')) DEFAULT 'out',
+    last_attendance_id INTEGER
+);
+
+CREATE TABLE IF NOT EXISTS attendance_types (
+    id INTEGER PRIMARY KEY,
+    type_name TEXT UNIQUE NOT NULL,
+    description TEXT,
+    is_active BOOLEAN DEFAULT TRUE
+);
+
+CREATE TABLE IF NOT EXISTS attendance_records (
+    id INTEGER PRIMARY KEY,
+    user_id INTEGER NOT NULL,
+    record_type TEXT CHECK(record_type IN ('clock_in', 'clock_out')) NOT NULL,
+    attendance_type_id INTEGER,
+    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
+    notes TEXT,
+    FOREIGN KEY(user_id) REFERENCES users(id),
+    FOREIGN KEY(attendance_type_id) REFERENCES attendance_types(id)
+);
+
+CREATE INDEX IF NOT EXISTS idx_users_discord_id ON users(discord_id);
+-- Every record query filters on one user and orders by time; index entries end
+-- in the rowid, so scanning this either way also matches the id tie-break
+CREATE INDEX IF NOT EXISTS idx_attendance_records_user_timestamp ON attendance_records(user_id, timestamp);
+DROP INDEX IF EXISTS idx_attendance_records_user_id;
+CREATE INDEX IF NOT EXISTS idx_attendance_records_timestamp ON attendance_records(timestamp);
+
+COMMIT;
+"""
+
+def _convert_datetime(value: bytes) -> datetime:
+    """Parse a DATETIME column value as stored by SQLite's CURRENT_TIMESTAMP."""
+    return datetime.fromisoformat(value.decode())
+
+# DATETIME columns are parsed by sqlite3 as rows are fetched (NULLs stay None);
+# computed values such as MAX(timestamp) carry no declared type and stay strings
+sqlite3.register_converter("DATETIME", _convert_datetime)
+
 class Database:
     """Database operations handler for attendance tracking."""
 
-    def __init__(self, db_path: Optional[str] = None):
-        """Initialize database connection."""
+    def __init__(
+        self,
+        db_path: Optional[str] = None,
+        pool_size: Optional[int] = None,
+        pool_min_size: Optional[int] = None
+    ):
+        """Initialize database connection pool settings."""
         self.db_path = db_path or Config.DATABASE_PATH
+        self.pool_size = max(1, pool_size or Config.DATABASE_POOL_SIZE)
+        min_size = Config.DATABASE_POOL_MIN_SIZE if pool_min_size is None else pool_min_size
+        self.pool_min_size = min(max(0, min_size), self.pool_size)
+        
+        # Writes go through one dedicated connection, serialized by a lock
+        self._writer: Optional[aiosqlite.Connection] = None
+        self._write_lock: Optional[asyncio.Lock] = None
+        
+        # Read-only connections are opened lazily, up to pool_size, and reused afterwards
+        self._idle: Optional[asyncio.Queue] = None
+        self._connections: List[aiosqlite.Connection] = []
+        # Connections still being opened count against pool_size too
+        self._opening = 0
+        # One permit per checkout, so at most pool_size readers are ever out or being opened
+        self._slots: Optional[asyncio.Semaphore] = None
+        self._in_use = 0
+        self._acquired = 0
+        self._wait_time = 0.0
+        
+        # Attendance type names never change once created, so they are memoized by ID
+        self._type_names: Dict[int, str] = {}
+        
+        # Bumped on every attendance type write so in-process caches know to refresh
+        self.types_version = 0
+
+    async def _open_connection(self, read_only: bool = False) -> aiosqlite.Connection:
+        """Open a new database connection with per-connection settings applied."""
+        # "file:" paths are SQLite URIs, e.g. a shared-cache in-memory database that
+        # the writer and the readers all see
+        conn = await aiosqlite.connect(
+            self.db_path,
+            cached_statements=STATEMENT_CACHE_SIZE,
+            detect_types=sqlite3.PARSE_DECLTYPES,
+            uri=self.db_path.startswith("file:")
+        )
+        # Enable foreign key constraints
+        await conn.execute("PRAGMA foreign_keys = ON")
+        if not read_only:
+            # WAL lets readers run alongside the writer and turns each commit into an
+            # append; the mode is stored in the database file, so readers inherit it
+            await conn.execute("PRAGMA journal_mode = WAL")
+        # With WAL, NORMAL sync only fsyncs at checkpoints
+        await conn.execute("PRAGMA synchronous = NORMAL")
+        await conn.execute("PRAGMA temp_store = MEMORY")
+        await conn.execute("PRAGMA cache_size = -64000")
+        await conn.execute("PRAGMA mmap_size = 268435456")
+        if read_only:
+            await conn.execute("PRAGMA query_only = ON")
+        return conn
+
+    def _pool_has_room(self, limit: int) -> bool:
+        """Whether another reader may be opened without the pool exceeding limit."""
+        return len(self._connections) + self._opening < limit
+
+    async def _open_reader(self) -> aiosqlite.Connection:
+        """Open a pooled read-only connection, holding its slot while the open is pending."""
+        # The slot is taken before the first await, so concurrent callers see it
+        self._opening += 1
+        try:
+            conn = await self._open_connection(read_only=True)
+        finally:
+            self._opening -= 1
+        self._connections.append(conn)
+        return conn
+
+    async def _warm_pool(self) -> None:
+        """Open connections up to the pool's minimum size ahead of the first commands."""
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+        
+        while self._pool_has_room(self.pool_min_size):
+            self._idle.put_nowait(await self._open_reader())
+
+    @asynccontextmanager
+    async def _read(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow a read-only connection from the pool, waiting if all of them are in use."""
+        if self._idle is None:
+            self._idle = asyncio.Queue()
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.pool_size)
+        
+        start = time.perf_counter()
+        await self._slots.acquire()
+        try:
+            if self._idle.empty() and self._pool_has_room(self.pool_size):
+                conn = await self._open_reader()
+            else:
+                # Only a warm-up open can be holding the room; its connection lands here
+                conn = await self._idle.get()
+        except BaseException:
+            # A failed open hands the permit to the next waiter, which retries the open
+            self._slots.release()
+            raise
+        
+        self._acquired += 1
+        self._wait_time += time.perf_counter() - start
+        self._in_use += 1
+        try:
+            yield conn
+        finally:
+            self._in_use -= 1
+            # Never hand a connection with a half-finished transaction to the next caller
+            if conn.in_transaction:
+                await conn.rollback()
+            self._idle.put_nowait(conn)
+            self._slots.release()
+
+    @asynccontextmanager
+    async def _write(self) -> AsyncIterator[aiosqlite.Connection]:
+        """Borrow the single writer connection, waiting for any other write to finish.
+        
+        SQLite allows one writer at a time anyway; queueing writes here keeps them
+        from contending for the file lock while readers continue under WAL.
+        """
+        if self._write_lock is None:
+            self._write_lock = asyncio.Lock()
+        
+        async with self._write_lock:
+            if self._writer is None:
+                self._writer = await self._open_connection()
+            try:
+                yield self._writer
+            finally:
+                # Never leave a half-finished transaction for the next writer
+                if self._writer.in_transaction:
+                    await self._writer.rollback()
+
+    def get_pool_stats(self) -> Dict[str, float]:
+        """Get connection pool counters for spotting over- or under-provisioning."""
+        return {
+            "writer_open": self._writer is not None,
+            "size": self.pool_size,
+            "open": len(self._connections),
+            "in_use": self._in_use,
+            "acquired": self._acquired,
+            "wait_time_ms": self._wait_time * 1000,
+        }
 
     async def init_database(self) -> None:
         """Initialize database tables and default data."""
-        async with aiosqlite.connect(self.db_path) as db:
-            # Enable foreign key constraints
-            await db.execute("PRAGMA foreign_keys = ON")
-            
-            # Create users table
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS users (
-                    id INTEGER PRIMARY KEY,
-                    discord_id TEXT UNIQUE NOT NULL,
-                    username TEXT NOT NULL,
-                    created_at DATETIME DEFAULT CURRENT_TIMESTAMP
-                )
-            """)
-            
-            # Create attendance_types table
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS attendance_types (
-                    id INTEGER PRIMARY KEY,
-                    type_name TEXT UNIQUE NOT NULL,
-                    description TEXT,
-                    is_active BOOLEAN DEFAULT TRUE
-                )
-            """)
-            
-            # Create attendance_records table
-            await db.execute("""
-                CREATE TABLE IF NOT EXISTS attendance_records (
-                    id INTEGER PRIMARY KEY,
-                    user_id INTEGER NOT NULL,
-                    record_type TEXT CHECK(record_type IN ('clock_in', 'clock_out')) NOT NULL,
-                    attendance_type_id INTEGER,
-                    timestamp DATETIME DEFAULT CURRENT_TIMESTAMP,
-                    notes TEXT,
-                    FOREIGN KEY(user_id) REFERENCES users(id),
-                    FOREIGN KEY(attendance_type_id) REFERENCES attendance_types(id)
-                )
-            """)
-            
-            # Create indexes for better performance
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_users_discord_id ON users(discord_id)")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_attendance_records_user_id ON attendance_records(user_id)")
-            await db.execute("CREATE INDEX IF NOT EXISTS idx_attendance_records_timestamp ON attendance_records(timestamp)")
-            
-            await db.commit()
-            
-            # Insert default attendance types
-            await self._insert_default_attendance_types()
+        async with self._write() as db:
+            # One script, one round-trip to the connection thread
+            await db.executescript(SCHEMA_SQL)
             
+            # Bring databases created before the clock state columns up to date
+            await self._migrate_user_state(db)
+        
+        # Insert default attendance types
+        await self._insert_default_attendance_types()
+        
+        # Concurrent first commands should not each pay the connection setup
+        await self._warm_pool()
+        
         logger.info("Database initialized successfully")
 
+    async def _migrate_user_state(self, db: aiosqlite.Connection) -> None:
+        """Add the clock state columns to an existing users table and backfill them."""
+        cursor = await db.execute("PRAGMA table_info(users)")
+        columns = {row[1] for row in await cursor.fetchall()}
+        if "current_state" in columns:
+            return
+        
+        await db.execute(
+            "ALTER TABLE users ADD COLUMN current_state TEXT CHECK(current_state IN ('in', 'out')) DEFAULT 'out'"
+        )
+        await db.execute("ALTER TABLE users ADD COLUMN last_attendance_id INTEGER")
+        
+        # Derive the state from each user's latest record
+        await db.execute("""
+            UPDATE users SET last_attendance_id = (
+                SELECT ar.id FROM attendance_records ar
+                WHERE ar.user_id = users.id
+                ORDER BY ar.timestamp DESC, ar.id DESC
+                LIMIT 1
+            )
+        """)
+        await db.execute("""
+            UPDATE users SET current_state = COALESCE((
+                SELECT CASE ar.record_type WHEN 'clock_in' THEN 'in' ELSE 'out' END
+                FROM attendance_records ar
+                WHERE ar.id = users.last_attendance_id
+            ), 'out')
+        """)
+        await db.commit()
+        logger.info("Migrated users table with clock state columns")
+
+    async def _set_user_state(self, db: aiosqlite.Connection, user_id: int, record_type: str, record_id: int) -> None:
+        """Record the user's clock state after a new attendance record (caller commits)."""
+        await db.execute(
+            "UPDATE users SET current_state = ?, last_attendance_id = ? WHERE id = ?",
+            ("in" if record_type == "clock_in" else "out", record_id, user_id)
+        )
+
     async def _insert_default_attendance_types(self) -> None:
         """Insert default attendance types if they don't exist."""
         default_types = [
@@ -78,20 +284,19 @@ class Database:
             ("Training", "Training or learning activities"),
         ]
         
-        async with aiosqlite.connect(self.db_path) as db:
-            for type_name, description in default_types:
-                await db.execute("""
-                    INSERT OR IGNORE INTO attendance_types (type_name, description)
-                    VALUES (?, ?)
-                """, (type_name, description))
+        async with self._write() as db:
+            await db.executemany("""
+                INSERT OR IGNORE INTO attendance_types (type_name, description)
+                VALUES (?, ?)
+            """, default_types)
             await db.commit()
 
     async def get_or_create_user(self, discord_id: str, username: str) -> User:
         """Get existing user or create new one."""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._read() as db:
             # Try to get existing user
             cursor = await db.execute(
-                "SELECT id, discord_id, username, created_at FROM users WHERE discord_id = ?",
+                "SELECT id, discord_id, username, created_at, current_state, last_attendance_id FROM users WHERE discord_id = ?",
                 (discord_id,)
             )
             row = await cursor.fetchone()
@@ -101,33 +306,24 @@ class Database:
                     id=row[0],
                     discord_id=row[1],
                     username=row[2],
-                    created_at=datetime.fromisoformat(row[3]) if row[3] else None
+                    created_at=row[3],
+                    current_state=row[4] or "out",
+                    last_attendance_id=row[5]
                 )
-            
-            # Create new user
-            cursor = await db.execute(
-                "INSERT INTO users (discord_id, username) VALUES (?, ?)",
-                (discord_id, username)
-            )
+        
+        # Create new user; another task may have created it since the read above
+        async with self._write() as db:
+            user = await self._upsert_user(db, discord_id, username)
             await db.commit()
-            
-            user_id = cursor.lastrowid
-            logger.info(f"Created new user: {username} (ID: {user_id})")
-            
-            return User(
-                id=user_id,
-                discord_id=discord_id,
-                username=username,
-                created_at=datetime.now()
-            )
+            logger.info("Created new user: %s (ID: %s)", username, user.id)
+            return user
 
     async def get_attendance_types(self) -> List[AttendanceType]:
         """Get all active attendance types."""
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute(
+        async with self._read() as db:
+            rows = await db.execute_fetchall(
                 "SELECT id, type_name, description, is_active FROM attendance_types WHERE is_active = TRUE"
             )
-            rows = await cursor.fetchall()
             
             return [
                 AttendanceType(
@@ -141,7 +337,7 @@ class Database:
 
     async def get_attendance_type_by_name(self, type_name: str) -> Optional[AttendanceType]:
         """Get attendance type by name."""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._read() as db:
             cursor = await db.execute(
                 "SELECT id, type_name, description, is_active FROM attendance_types WHERE type_name = ? AND is_active = TRUE",
                 (type_name,)
@@ -157,17 +353,37 @@ class Database:
                 )
             return None
 
+    async def get_attendance_type_names(self, attendance_type_ids: List[int]) -> Dict[int, str]:
+        """Get the names of several attendance types by ID in one query (including inactive types)."""
+        names = {type_id: self._type_names[type_id] for type_id in attendance_type_ids if type_id in self._type_names}
+        missing_ids = [type_id for type_id in attendance_type_ids if type_id not in names]
+        if not missing_ids:
+            return names
+        
+        async with self._read() as db:
+            placeholders = ", ".join("?" for _ in missing_ids)
+            rows = await db.execute_fetchall(
+                f"SELECT id, type_name FROM attendance_types WHERE id IN ({placeholders})",
+                missing_ids
+            )
+            for type_id, type_name in rows:
+                self._type_names[type_id] = type_name
+                names[type_id] = type_name
+        
+        return names
+
     async def create_attendance_type(self, type_name: str, description: str = "") -> AttendanceType:
         """Create a new attendance type."""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._write() as db:
             cursor = await db.execute("""
                 INSERT INTO attendance_types (type_name, description, is_active)
                 VALUES (?, ?, TRUE)
             """, (type_name, description))
             await db.commit()
+            self.types_version += 1
             
             attendance_type_id = cursor.lastrowid
-            logger.info(f"Created new attendance type: {type_name} (ID: {attendance_type_id})")
+            logger.info("Created new attendance type: %s (ID: %s)", type_name, attendance_type_id)
             
             return AttendanceType(
                 id=attendance_type_id,
@@ -178,7 +394,7 @@ class Database:
 
     async def attendance_type_exists(self, type_name: str) -> bool:
         """Check if attendance type exists (case-insensitive)."""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._read() as db:
             cursor = await db.execute(
                 "SELECT COUNT(*) FROM attendance_types WHERE LOWER(type_name) = LOWER(?)",
                 (type_name,)
@@ -188,11 +404,11 @@ class Database:
 
     async def get_all_attendance_types(self) -> List[AttendanceType]:
         """Get all attendance types (including inactive)."""
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute(
+        async with self._read() as db:
+            # execute_fetchall runs the query and fetches the rows in one hop to the connection thread
+            rows = await db.execute_fetchall(
                 "SELECT id, type_name, description, is_active FROM attendance_types ORDER BY type_name"
             )
-            rows = await cursor.fetchall()
             
             return [
                 AttendanceType(
@@ -206,12 +422,12 @@ class Database:
 
     async def get_latest_record(self, user_id: int) -> Optional[AttendanceRecord]:
         """Get the latest attendance record for a user."""
-        async with aiosqlite.connect(self.db_path) as db:
+        async with self._read() as db:
             cursor = await db.execute("""
                 SELECT id, user_id, record_type, attendance_type_id, timestamp, notes
                 FROM attendance_records
                 WHERE user_id = ?
-                ORDER BY timestamp DESC
+                ORDER BY timestamp DESC, id DESC
                 LIMIT 1
             """, (user_id,))
             row = await cursor.fetchone()
@@ -222,31 +438,44 @@ class Database:
                     user_id=row[1],
                     record_type=row[2],
                     attendance_type_id=row[3],
-                    timestamp=datetime.fromisoformat(row[4]) if row[4] else None,
+                    timestamp=row[4],
                     notes=row[5]
                 )
             return None
 
+    async def _get_user_state(self, user_id: int) -> Tuple[str, Optional[int]]:
+        """Get the user's current clock state and latest attendance record ID."""
+        async with self._read() as db:
+            cursor = await db.execute(
+                "SELECT current_state, last_attendance_id FROM users WHERE id = ?",
+                (user_id,)
+            )
+            row = await cursor.fetchone()
+            
+            if not row:
+                return "out", None
+            return row[0] or "out", row[1]
+
     async def can_clock_in(self, user_id: int) -> Tuple[bool, str]:
         """Check if user can clock in (not already clocked in)."""
-        latest_record = await self.get_latest_record(user_id)
+        current_state, last_attendance_id = await self._get_user_state(user_id)
         
-        if latest_record is None:
+        if last_attendance_id is None:
             return True, "No previous records found"
         
-        if latest_record.record_type == "clock_out":
+        if current_state == "out":
             return True, "Last record was clock-out"
         
         return False, "Already clocked in. Please clock out first."
 
     async def can_clock_out(self, user_id: int) -> Tuple[bool, str]:
         """Check if user can clock out (currently clocked in)."""
-        latest_record = await self.get_latest_record(user_id)
+        current_state, last_attendance_id = await self._get_user_state(user_id)
         
-        if latest_record is None:
+        if last_attendance_id is None:
             return False, "No clock-in record found. Please clock in first."
         
-        if latest_record.record_type == "clock_in":
+        if current_state == "in":
             return True, "Currently clocked in"
         
         return False, "Not currently clocked in. Please clock in first."
@@ -259,75 +488,245 @@ class Database:
         notes: Optional[str] = None
     ) -> AttendanceRecord:
         """Create a new attendance record."""
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute("""
-                INSERT INTO attendance_records (user_id, record_type, attendance_type_id, notes)
-                VALUES (?, ?, ?, ?)
-            """, (user_id, record_type, attendance_type_id, notes))
+        async with self._write() as db:
+            record = await self._insert_record(db, user_id, record_type, attendance_type_id, notes)
             await db.commit()
             
-            record_id = cursor.lastrowid
-            
-            # Get the created record with timestamp
-            cursor = await db.execute("""
-                SELECT id, user_id, record_type, attendance_type_id, timestamp, notes
-                FROM attendance_records
-                WHERE id = ?
-            """, (record_id,))
-            row = await cursor.fetchone()
+            logger.info("Created %s record for user %s", record_type, user_id)
+            return record
+
+    async def bulk_create_attendance_records(
+        self,
+        records: List[Tuple[int, str, Optional[int], Optional[str]]]
+    ) -> List[AttendanceRecord]:
+        """Create several attendance records in one transaction (e.g. for imports or seeding).
+        
+        Each entry is `(user_id, record_type, attendance_type_id, notes)`; every
+        user's clock state follows the last of their records in the list. Unlike
+        clock_in_tx/clock_out_tx this does not check clock state: callers must
+        supply a valid clock-in/clock-out sequence for each user.
+        """
+        if not records:
+            return []
+        
+        async with self._write() as db:
+            rows = []
+            for chunk_start in range(0, len(records), BULK_INSERT_ROWS):
+                chunk = records[chunk_start:chunk_start + BULK_INSERT_ROWS]
+                placeholders = ", ".join("(?, ?, ?, ?)" for _ in chunk)
+                rows += await db.execute_fetchall(f"""
+                    INSERT INTO attendance_records (user_id, record_type, attendance_type_id, notes)
+                    VALUES {placeholders}
+                    RETURNING id, user_id, record_type, attendance_type_id, timestamp, notes
+                """, [value for record in chunk for value in record])
+            created = sorted(
+                (
+                    AttendanceRecord(
+                        id=row[0],
+                        user_id=row[1],
+                        record_type=row[2],
+                        attendance_type_id=row[3],
+                        timestamp=row[4],
+                        notes=row[5]
+                    )
+                    for row in rows
+                ),
+                key=lambda record: record.id
+            )
             
-            record = AttendanceRecord(
-                id=row[0],
-                user_id=row[1],
-                record_type=row[2],
-                attendance_type_id=row[3],
-                timestamp=datetime.fromisoformat(row[4]) if row[4] else None,
-                notes=row[5]
+            # Later records overwrite earlier ones, leaving each user's latest state
+            latest = {record.user_id: record for record in created}
+            await db.executemany(
+                "UPDATE users SET current_state = ?, last_attendance_id = ? WHERE id = ?",
+                [
+                    ("in" if record.record_type == "clock_in" else "out", record.id, record.user_id)
+                    for record in latest.values()
+                ]
             )
+            await db.commit()
             
-            logger.info(f"Created {record_type} record for user {user_id}")
-            return record
+            logger.info("Created %s attendance records", len(created))
+            return created
 
-    async def get_user_attendance_summary(self, user_id: int) -> Optional[AttendanceSummary]:
-        """Get attendance summary for a user."""
-        async with aiosqlite.connect(self.db_path) as db:
-            # Get user info and record count
-            cursor = await db.execute("""
-                SELECT u.username, COUNT(ar.id) as total_records
-                FROM users u
-                LEFT JOIN attendance_records ar ON u.id = ar.user_id
-                WHERE u.id = ?
-                GROUP BY u.id, u.username
-            """, (user_id,))
-            row = await cursor.fetchone()
+    async def _upsert_user(self, db: aiosqlite.Connection, discord_id: str, username: str) -> User:
+        """Register the user if needed and return their row (caller commits).
+        
+        An existing user's stored name is refreshed to their current display name.
+        """
+        rows = await db.execute_fetchall("""
+            INSERT INTO users (discord_id, username) VALUES (?, ?)
+            ON CONFLICT(discord_id) DO UPDATE SET username = excluded.username
+            RETURNING id, discord_id, username, created_at, current_state, last_attendance_id
+        """, (discord_id, username))
+        row = rows[0]
+        return User(
+            id=row[0],
+            discord_id=row[1],
+            username=row[2],
+            created_at=row[3],
+            current_state=row[4] or "out",
+            last_attendance_id=row[5]
+        )
+
+    async def _insert_record(
+        self,
+        db: aiosqlite.Connection,
+        user_id: int,
+        record_type: str,
+        attendance_type_id: Optional[int],
+        notes: Optional[str]
+    ) -> AttendanceRecord:
+        """Insert an attendance record and update the user's clock state (caller commits)."""
+        # RETURNING hands back the generated ID and default timestamp without a second query
+        rows = await db.execute_fetchall("""
+            INSERT INTO attendance_records (user_id, record_type, attendance_type_id, notes)
+            VALUES (?, ?, ?, ?)
+            RETURNING id, timestamp
+        """, (user_id, record_type, attendance_type_id, notes))
+        record_id, timestamp = rows[0]
+        await self._set_user_state(db, user_id, record_type, record_id)
+        
+        return AttendanceRecord(
+            id=record_id,
+            user_id=user_id,
+            record_type=record_type,
+            attendance_type_id=attendance_type_id,
+            timestamp=timestamp,
+            notes=notes
+        )
+
+    async def clock_in_tx(
+        self,
+        discord_id: str,
+        username: str,
+        type_name: str,
+        notes: Optional[str] = None,
+        attendance_type_id: Optional[int] = None
+    ) -> ClockInResult:
+        """Register the user if needed, validate and record a clock-in in one transaction.
+        
+        Callers that already know the active type's ID can pass it to skip the name lookup.
+        """
+        async with self._write() as db:
+            # Take the write lock up front, so the checks below cannot race
+            # with another clock-in for the same user
+            await db.execute("BEGIN IMMEDIATE")
+            user = await self._upsert_user(db, discord_id, username)
             
-            if not row:
-                return None
+            # Check the user is not already clocked in
+            if user.current_state == "in":
+                await db.commit()
+                return ClockInResult(
+                    status=ClockStatus.ALREADY_IN,
+                    reason="Already clocked in. Please clock out first.",
+                    user=user
+                )
             
-            username, total_records = row
+            # Resolve the attendance type
+            if attendance_type_id is None:
+                cursor = await db.execute(
+                    "SELECT id FROM attendance_types WHERE type_name = ? AND is_active = TRUE",
+                    (type_name,)
+                )
+                row = await cursor.fetchone()
+                if not row:
+                    await db.commit()
+                    return ClockInResult(
+                        status=ClockStatus.UNKNOWN_TYPE,
+                        reason=f"Attendance type '{type_name}' not found.",
+                        user=user
+                    )
+                attendance_type_id = row[0]
             
-            # Get latest clock-in and clock-out times
-            cursor = await db.execute("""
-                SELECT record_type, MAX(timestamp) as latest_time
-                FROM attendance_records
-                WHERE user_id = ?
-                GROUP BY record_type
-            """, (user_id,))
+            # Create the clock-in record
+            record = await self._insert_record(db, user.id, "clock_in", attendance_type_id, notes)
+            await db.commit()
             
-            latest_times = {row[0]: datetime.fromisoformat(row[1]) for row in await cursor.fetchall()}
+            logger.info("Created clock_in record for user %s", user.id)
+            return ClockInResult(status=ClockStatus.OK, reason="Clocked in", user=user, record=record)
+
+    async def clock_out_tx(
+        self,
+        discord_id: str,
+        username: str,
+        notes: Optional[str] = None
+    ) -> ClockOutResult:
+        """Register the user if needed, validate and record a clock-out in one transaction."""
+        async with self._write() as db:
+            # Take the write lock up front, so the check below cannot race
+            # with another clock-out for the same user
+            await db.execute("BEGIN IMMEDIATE")
+            user = await self._upsert_user(db, discord_id, username)
             
-            # Check if currently clocked in
-            latest_record = await self.get_latest_record(user_id)
-            is_currently_clocked_in = bool(latest_record and latest_record.record_type == "clock_in")
+            # Check the user is currently clocked in
+            if user.last_attendance_id is None or user.current_state != "in":
+                await db.commit()
+                reason = (
+                    "No clock-in record found. Please clock in first."
+                    if user.last_attendance_id is None
+                    else "Not currently clocked in. Please clock in first."
+                )
+                return ClockOutResult(status=ClockStatus.NOT_IN, reason=reason, user=user)
             
-            return AttendanceSummary(
-                user_id=user_id,
-                username=username,
-                total_records=total_records,
-                latest_clock_in=latest_times.get("clock_in"),
-                latest_clock_out=latest_times.get("clock_out"),
-                is_currently_clocked_in=is_currently_clocked_in
-            )
+            # Create the clock-out record
+            record = await self._insert_record(db, user.id, "clock_out", None, notes)
+            await db.commit()
+            
+            logger.info("Created clock_out record for user %s", user.id)
+            return ClockOutResult(status=ClockStatus.OK, reason="Clocked out", user=user, record=record)
+
+    async def get_user_attendance_summary(self, user_id: int) -> Optional[AttendanceSummary]:
+        """Get attendance summary for a user."""
+        async with self._read() as db:
+            return await self._fetch_attendance_summary(db, user_id)
+
+    async def _fetch_attendance_summary(self, db: aiosqlite.Connection, user_id: int) -> Optional[AttendanceSummary]:
+        """Build a user's attendance summary on an already acquired connection."""
+        # User info, record count and latest clock times in one aggregate pass
+        cursor = await db.execute("""
+            SELECT
+                u.username,
+                u.current_state,
+                COUNT(ar.id) as total_records,
+                MAX(CASE WHEN ar.record_type = 'clock_in' THEN ar.timestamp END) as latest_clock_in,
+                MAX(CASE WHEN ar.record_type = 'clock_out' THEN ar.timestamp END) as latest_clock_out
+            FROM users u
+            LEFT JOIN attendance_records ar ON u.id = ar.user_id
+            WHERE u.id = ?
+            GROUP BY u.id, u.username
+        """, (user_id,))
+        row = await cursor.fetchone()
+        
+        if not row:
+            return None
+        
+        username, current_state, total_records, latest_clock_in, latest_clock_out = row
+        
+        return AttendanceSummary(
+            user_id=user_id,
+            username=username,
+            total_records=total_records,
+            latest_clock_in=datetime.fromisoformat(latest_clock_in) if latest_clock_in else None,
+            latest_clock_out=datetime.fromisoformat(latest_clock_out) if latest_clock_out else None,
+            is_currently_clocked_in=current_state == "in"
+        )
+
+    async def get_summary_with_recent_records(
+        self,
+        user_id: int,
+        limit: int = 5
+    ) -> Tuple[Optional[AttendanceSummary], List[Tuple[AttendanceRecord, Optional[str]]]]:
+        """Get a user's summary and recent records (with type names) on one connection.
+        
+        Both reads run in a single transaction, so the record count and the
+        recent activity always describe the same snapshot.
+        """
+        async with self._read() as db:
+            await db.execute("BEGIN")
+            summary = await self._fetch_attendance_summary(db, user_id)
+            records = await self._fetch_records_with_type_name(db, user_id, limit) if summary else []
+            await db.commit()
+            return summary, records
 
     async def get_user_records(
         self,
@@ -336,59 +735,191 @@ class Database:
         offset: int = 0
     ) -> List[AttendanceRecord]:
         """Get attendance records for a user."""
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute("""
+        async with self._read() as db:
+            rows = await db.execute_fetchall("""
                 SELECT id, user_id, record_type, attendance_type_id, timestamp, notes
                 FROM attendance_records
                 WHERE user_id = ?
-                ORDER BY timestamp DESC
+                ORDER BY timestamp DESC, id DESC
                 LIMIT ? OFFSET ?
             """, (user_id, limit, offset))
             
-            rows = await cursor.fetchall()
-            
             return [
                 AttendanceRecord(
                     id=row[0],
                     user_id=row[1],
                     record_type=row[2],
                     attendance_type_id=row[3],
-                    timestamp=datetime.fromisoformat(row[4]) if row[4] else None,
+                    timestamp=row[4],
                     notes=row[5]
                 )
                 for row in rows
             ]
 
-    async def get_user_records_by_week(
+    async def get_user_records_with_type_name(
         self,
         user_id: int,
-        start_date: datetime,
-        end_date: datetime
-    ) -> List[AttendanceRecord]:
-        """Get attendance records for a user within a specific week."""
-        async with aiosqlite.connect(self.db_path) as db:
-            cursor = await db.execute("""
-                SELECT id, user_id, record_type, attendance_type_id, timestamp, notes
-                FROM attendance_records
-                WHERE user_id = ? AND timestamp BETWEEN ? AND ?
-                ORDER BY timestamp ASC
-            """, (user_id, start_date.isoformat(), end_date.isoformat()))
-            
-            rows = await cursor.fetchall()
-            
-            return [
+        limit: int = 10
+    ) -> List[Tuple[AttendanceRecord, Optional[str]]]:
+        """Get recent attendance records for a user along with their attendance type names."""
+        async with self._read() as db:
+            return await self._fetch_records_with_type_name(db, user_id, limit)
+
+    async def _fetch_records_with_type_name(
+        self,
+        db: aiosqlite.Connection,
+        user_id: int,
+        limit: int
+    ) -> List[Tuple[AttendanceRecord, Optional[str]]]:
+        """Fetch recent records with their type names on an already acquired connection."""
+        rows = await db.execute_fetchall("""
+            SELECT ar.id, ar.user_id, ar.record_type, ar.attendance_type_id, ar.timestamp, ar.notes, at.type_name
+            FROM attendance_records ar
+            LEFT JOIN attendance_types at ON ar.attendance_type_id = at.id
+            WHERE ar.user_id = ?
+            ORDER BY ar.timestamp DESC, ar.id DESC
+            LIMIT ?
+        """, (user_id, limit))
+        
+        return [
+            (
                 AttendanceRecord(
                     id=row[0],
                     user_id=row[1],
                     record_type=row[2],
                     attendance_type_id=row[3],
-                    timestamp=datetime.fromisoformat(row[4]) if row[4] else None,
+                    timestamp=row[4],
                     notes=row[5]
-                )
-                for row in rows
-            ]
+                ),
+                row[6]
+            )
+            for row in rows
+        ]
+
+    async def get_user_records_by_week(
+        self,
+        user_id: int,
+        start_date: datetime,
+        end_date: datetime
+    ) -> List[AttendanceRecord]:
+        """Get attendance records for a user within a specific week, oldest first."""
+        async with self._read() as db:
+            return await self._fetch_records_by_week(db, user_id, start_date, end_date)
+
+    async def _fetch_records_by_week(
+        self,
+        db: aiosqlite.Connection,
+        user_id: int,
+        start_date: datetime,
+        end_date: datetime
+    ) -> List[AttendanceRecord]:
+        """Fetch a week's records, oldest first, on an already acquired connection."""
+        rows = await db.execute_fetchall("""
+            SELECT id, user_id, record_type, attendance_type_id, timestamp, notes
+            FROM attendance_records
+            WHERE user_id = ? AND timestamp BETWEEN ? AND ?
+            ORDER BY timestamp ASC, id ASC
+        """, (user_id, start_date.isoformat(), end_date.isoformat()))
+        
+        return [
+            AttendanceRecord(
+                id=row[0],
+                user_id=row[1],
+                record_type=row[2],
+                attendance_type_id=row[3],
+                timestamp=row[4],
+                notes=row[5]
+            )
+            for row in rows
+        ]
+
+    async def get_weekly_aggregates(
+        self,
+        user_id: int,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Tuple[Dict[date, Tuple[int, bool]], Dict[int, int]]:
+        """Get per-day work seconds and clock-in counts per attendance type within a week.
+        
+        A clock-in counts towards the day's hours when the next record that day is a
+        clock-out; a day whose last record is a clock-in has an incomplete session.
+        Returns `({day: (work_seconds, has_incomplete)}, {attendance_type_id: clock_ins})`.
+        """
+        async with self._read() as db:
+            return await self._fetch_weekly_aggregates(db, user_id, start_date, end_date)
+
+    async def _fetch_weekly_aggregates(
+        self,
+        db: aiosqlite.Connection,
+        user_id: int,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Tuple[Dict[date, Tuple[int, bool]], Dict[int, int]]:
+        """Aggregate a week's work time and type counts on an already acquired connection."""
+        params = (user_id, start_date.isoformat(), end_date.isoformat())
+        rows = await db.execute_fetchall("""
+            WITH week_records AS (
+                SELECT
+                    record_type,
+                    timestamp,
+                    date(timestamp) AS day,
+                    LEAD(record_type) OVER (PARTITION BY date(timestamp) ORDER BY timestamp, id) AS next_type,
+                    LEAD(timestamp) OVER (PARTITION BY date(timestamp) ORDER BY timestamp, id) AS next_timestamp
+                FROM attendance_records
+                WHERE user_id = ? AND timestamp BETWEEN ? AND ?
+            )
+            SELECT
+                day,
+                SUM(CASE WHEN record_type = 'clock_in' AND next_type = 'clock_out'
+                    THEN CAST(strftime('%s', next_timestamp) AS INTEGER) - CAST(strftime('%s', timestamp) AS INTEGER)
+                    ELSE 0 END) AS work_seconds,
+                MAX(record_type = 'clock_in' AND next_type IS NULL) AS has_incomplete
+            FROM week_records
+            GROUP BY day
+        """, params)
+        daily = {
+            date.fromisoformat(row[0]): (row[1], bool(row[2]))
+            for row in rows
+        }
+        
+        # Ordered by first use so ties keep the type used earliest in the week
+        rows = await db.execute_fetchall("""
+            SELECT attendance_type_id, COUNT(*)
+            FROM attendance_records
+            WHERE user_id = ? AND timestamp BETWEEN ? AND ?
+                AND record_type = 'clock_in' AND attendance_type_id IS NOT NULL
+            GROUP BY attendance_type_id
+            ORDER BY MIN(timestamp)
+        """, params)
+        type_counts = {row[0]: row[1] for row in rows}
+        
+        return daily, type_counts
+
+    async def get_weekly_records_with_aggregates(
+        self,
+        user_id: int,
+        start_date: datetime,
+        end_date: datetime
+    ) -> Tuple[List[AttendanceRecord], Dict[date, Tuple[int, bool]], Dict[int, int]]:
+        """Get a week's records together with their aggregates on one connection.
+        
+        All reads run in a single transaction, so the listed records always match
+        the day totals and incomplete-session flags computed from them.
+        """
+        async with self._read() as db:
+            await db.execute("BEGIN")
+            records = await self._fetch_records_by_week(db, user_id, start_date, end_date)
+            daily, type_counts = await self._fetch_weekly_aggregates(db, user_id, start_date, end_date)
+            await db.commit()
+            return records, daily, type_counts
 
     async def close(self) -> None:
         """Close database connections."""
-        # aiosqlite handles connection closing automatically
-        pass
+        if self._writer is not None:
+            await self._writer.close()
+            self._writer = None
+        for conn in self._connections:
+            await conn.close()
+        self._connections.clear()
+        self._idle = None
+        self._slots = None
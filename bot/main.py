@@ -12,6 +12,7 @@ from discord.ext import commands
 from .config import Config
 from .database import Database
 from .commands import setup as setup_commands
+from .utils import ERROR_COLOR
 
 logger = logging.getLogger(__name__)
 
@@ -34,6 +35,13 @@ class AttendanceBot(commands.Bot):
         # Initialize database
         self.database: Optional[Database] = None
         
+        # Generic error reply, built once and shared by both error handlers
+        self._command_error_embed = discord.Embed(
+            title="❌ Error",
+            description="An error occurred while processing your command.",
+            color=ERROR_COLOR
+        )
+        
     async def setup_hook(self) -> None:
         """Set up the bot after login."""
         logger.info("Setting up bot...")
@@ -46,12 +54,12 @@ class AttendanceBot(commands.Bot):
         await setup_commands(self, self.database)
         
         # Sync commands (for development - in production you'd do this manually)
-        guild_id = Config._get_guild_id()
+        guild_id = Config.GUILD_ID
         if guild_id:
             guild = discord.Object(id=guild_id)
             self.tree.copy_global_to(guild=guild)
             await self.tree.sync(guild=guild)
-            logger.info(f"Synced commands to guild {guild_id}")
+            logger.info("Synced commands to guild %s", guild_id)
         else:
             await self.tree.sync()
             logger.info("Synced commands globally")
@@ -60,8 +68,8 @@ class AttendanceBot(commands.Bot):
     
     async def on_ready(self) -> None:
         """Called when the bot is ready."""
-        logger.info(f"Bot logged in as {self.user} (ID: {self.user.id if self.user else 'Unknown'})")
-        logger.info(f"Discord.py version: {discord.__version__}")
+        logger.info("Bot logged in as %s (ID: %s)", self.user, self.user.id if self.user else 'Unknown')
+        logger.info("Discord.py version: %s", discord.__version__)
         
         # Set bot status
         activity = discord.Activity(
@@ -72,17 +80,13 @@ class AttendanceBot(commands.Bot):
     
     async def on_command_error(self, ctx, error) -> None:
         """Handle command errors."""
-        logger.error(f"Command error: {error}")
+        logger.error("Command error: %s", error)
         
         if isinstance(error, commands.CommandNotFound):
             return  # Ignore command not found errors
         
         # Send error message to user
-        embed = discord.Embed(
-            title="❌ Error",
-            description="An error occurred while processing your command.",
-            color=discord.Color.red()
-        )
+        embed = self._command_error_embed
         
         try:
             await ctx.send(embed=embed, ephemeral=True)
@@ -91,13 +95,9 @@ class AttendanceBot(commands.Bot):
     
     async def on_app_command_error(self, interaction: discord.Interaction, error) -> None:
         """Handle application command errors."""
-        logger.error(f"App command error: {error}")
+        logger.error("App command error: %s", error)
         
-        embed = discord.Embed(
-            title="❌ Error",
-            description="An error occurred while processing your command.",
-            color=discord.Color.red()
-        )
+        embed = self._command_error_embed
         
         try:
             if interaction.response.is_done():
@@ -112,6 +112,7 @@ class AttendanceBot(commands.Bot):
         logger.info("Shutting down bot...")
         
         if self.database:
+            logger.info("Database pool stats: %s", self.database.get_pool_stats())
             await self.database.close()
         
         await super().close()
@@ -147,7 +148,7 @@ async def main():
     except KeyboardInterrupt:
         logger.info("Received keyboard interrupt, shutting down...")
     except Exception as e:
-        logger.error(f"Bot crashed: {e}")
+        logger.error("Bot crashed: %s", e)
         raise
     finally:
         if not bot.is_closed():
@@ -1,38 +1,45 @@
 """Data models for the Discord Attendance Bot."""
 
+from dataclasses import dataclass
 from datetime import datetime
+from enum import Enum
 from typing import Optional
 from pydantic import BaseModel, Field
 
+# Rows read from the database are plain dataclasses: their values come from our own
+# schema, so only the request models that wrap user input go through Pydantic.
+# Required fields come first because dataclass fields with defaults must follow them.
 
-class User(BaseModel):
+
+@dataclass
+class User:
     """User model representing a Discord user."""
+    discord_id: str  # Discord user ID
+    username: str  # Discord username
     id: Optional[int] = None
-    discord_id: str = Field(..., description="Discord user ID")
-    username: str = Field(..., description="Discord username")
     created_at: Optional[datetime] = None
+    current_state: str = "out"  # Current clock state: in or out
+    last_attendance_id: Optional[int] = None  # ID of the user's latest attendance record
 
 
-class AttendanceType(BaseModel):
+@dataclass
+class AttendanceType:
     """Attendance type model for categorizing different types of work."""
+    type_name: str
     id: Optional[int] = None
-    type_name: str = Field(..., description="Name of the attendance type")
-    description: Optional[str] = Field(None, description="Description of the attendance type")
-    is_active: bool = Field(True, description="Whether this attendance type is active")
+    description: Optional[str] = None
+    is_active: bool = True
 
 
-class AttendanceRecord(BaseModel):
+@dataclass
+class AttendanceRecord:
     """Attendance record model for tracking clock-in/clock-out events."""
+    user_id: int  # User ID from users table
+    record_type: str  # Type of record: clock_in or clock_out
     id: Optional[int] = None
-    user_id: int = Field(..., description="User ID from users table")
-    record_type: str = Field(..., description="Type of record: clock_in or clock_out")
-    attendance_type_id: Optional[int] = Field(None, description="Attendance type ID")
+    attendance_type_id: Optional[int] = None
     timestamp: Optional[datetime] = None
-    notes: Optional[str] = Field(None, description="Optional notes for the record")
-
-    class Config:
-        """Pydantic configuration."""
-        validate_assignment = True
+    notes: Optional[str] = None
 
 
 class ClockInRequest(BaseModel):
@@ -46,7 +53,8 @@ class ClockOutRequest(BaseModel):
     notes: Optional[str] = Field(None, max_length=500, description="Optional notes")
 
 
-class AttendanceSummary(BaseModel):
+@dataclass
+class AttendanceSummary:
     """Summary model for attendance reports."""
     user_id: int
     username: str
@@ -54,3 +62,29 @@ class AttendanceSummary(BaseModel):
     latest_clock_in: Optional[datetime] = None
     latest_clock_out: Optional[datetime] = None
     is_currently_clocked_in: bool = False
+
+
+class ClockStatus(str, Enum):
+    """Outcome of a clock-in/clock-out transaction."""
+    OK = "ok"
+    ALREADY_IN = "already_in"
+    NOT_IN = "not_in"
+    UNKNOWN_TYPE = "unknown_type"
+
+
+@dataclass
+class ClockInResult:
+    """Result of a clock-in transaction."""
+    status: ClockStatus
+    reason: str  # Human readable explanation of the status
+    user: User
+    record: Optional[AttendanceRecord] = None
+
+
+@dataclass
+class ClockOutResult:
+    """Result of a clock-out transaction."""
+    status: ClockStatus
+    reason: str  # Human readable explanation of the status
+    user: User
+    record: Optional[AttendanceRecord] = None
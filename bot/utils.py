@@ -1,67 +1,300 @@
 """Utility functions for the Discord Attendance Bot."""
 
+import asyncio
+import calendar
+import functools
+import logging
+import time
 import discord
+from collections import defaultdict
 from datetime import datetime, timezone, timedelta, date
-from typing import Optional, Tuple, List, Dict
+from typing import Awaitable, Optional, Set, Tuple, List, Dict
 from .models import AttendanceRecord
 
+logger = logging.getLogger(__name__)
+
+# How often stale cooldown entries are dropped
+COOLDOWN_PRUNE_INTERVAL = 60.0
+
+# Seconds a command may run before it is deferred, well inside Discord's 3 second deadline
+DEFER_AFTER = 1.5
+
+# Per-interaction locks serializing the deferral timer with the command's reply
+_ack_locks: Dict[int, asyncio.Lock] = {}
+
+# Strong references to running background tasks so they are not garbage collected
+_background_tasks: Set[asyncio.Task] = set()
+
+def run_in_background(coro: Awaitable, description: str) -> asyncio.Task:
+    """Schedule non-critical work without delaying the user-visible response.
+    
+    Failures are logged instead of being lost with the unawaited task.
+    """
+    task = asyncio.ensure_future(coro)
+    _background_tasks.add(task)
+    
+    def _on_done(done: asyncio.Task) -> None:
+        _background_tasks.discard(done)
+        if not done.cancelled() and done.exception() is not None:
+            logger.error("Background task failed (%s): %s", description, done.exception())
+    
+    task.add_done_callback(_on_done)
+    return task
+
+# Embed colors, built once instead of on every embed
+SUCCESS_COLOR = discord.Color.green()
+ERROR_COLOR = discord.Color.red()
+INFO_COLOR = discord.Color.blue()
+
 def format_timestamp(dt: datetime, style: str = "f") -> str:
     """Format datetime as Discord timestamp."""
-    if dt.tzinfo is None:
-        dt = dt.replace(tzinfo=timezone.utc)
-    
-    timestamp = int(dt.timestamp())
+    # Naive datetimes from SQLite are UTC; timegm reads them as such without a copy
+    timestamp = int(dt.timestamp()) if dt.tzinfo else calendar.timegm(dt.timetuple())
     return f"<t:{timestamp}:{style}>"
 
-def create_success_embed(title: str, description: str, user: discord.User) -> discord.Embed:
-    """Create a success embed message."""
+def author_icon_url(user: discord.User) -> str:
+    """Get the icon URL to show next to a user's name in an embed."""
+    # display_avatar falls back to the default avatar, so it is never None
+    return user.display_avatar.url
+
+def create_success_embed(
+    title: str,
+    description: str,
+    user: discord.User,
+    timestamp: Optional[datetime] = None
+) -> discord.Embed:
+    """Create a success embed message.
+    
+    The embed only carries a timestamp when one is given; Discord already shows
+    when the message itself was sent.
+    """
     embed = discord.Embed(
         title=f"✅ {title}",
         description=description,
-        color=discord.Color.green(),
-        timestamp=datetime.now(timezone.utc)
+        color=SUCCESS_COLOR,
+        timestamp=timestamp
     )
-    embed.set_author(name=user.display_name, icon_url=user.avatar.url if user.avatar else None)
+    embed.set_author(name=user.display_name, icon_url=author_icon_url(user))
     return embed
 
-def create_error_embed(title: str, description: str, user: Optional[discord.User] = None) -> discord.Embed:
+def create_error_embed(
+    title: str,
+    description: str,
+    user: Optional[discord.User] = None,
+    timestamp: Optional[datetime] = None
+) -> discord.Embed:
     """Create an error embed message."""
     embed = discord.Embed(
         title=f"❌ {title}",
         description=description,
-        color=discord.Color.red(),
-        timestamp=datetime.now(timezone.utc)
+        color=ERROR_COLOR,
+        timestamp=timestamp
     )
     if user:
-        embed.set_author(name=user.display_name, icon_url=user.avatar.url if user.avatar else None)
+        embed.set_author(name=user.display_name, icon_url=author_icon_url(user))
     return embed
 
-def create_info_embed(title: str, description: str, user: Optional[discord.User] = None) -> discord.Embed:
+def create_info_embed(
+    title: str,
+    description: str,
+    user: Optional[discord.User] = None,
+    timestamp: Optional[datetime] = None
+) -> discord.Embed:
     """Create an info embed message."""
     embed = discord.Embed(
         title=f"ℹ️ {title}",
         description=description,
-        color=discord.Color.blue(),
-        timestamp=datetime.now(timezone.utc)
+        color=INFO_COLOR,
+        timestamp=timestamp
     )
     if user:
-        embed.set_author(name=user.display_name, icon_url=user.avatar.url if user.avatar else None)
+        embed.set_author(name=user.display_name, icon_url=author_icon_url(user))
     return embed
 
-def format_attendance_record(record, attendance_type_name: Optional[str] = None) -> str:
-    """Format an attendance record for display."""
-    record_type_display = "🟢 Clock In" if record.record_type == "clock_in" else "🔴 Clock Out"
-    timestamp = format_timestamp(record.timestamp) if record.timestamp else "Unknown time"
+# Template for the generic error shown when a command fails unexpectedly
+SYSTEM_ERROR = {
+    "type": "rich",
+    "title": "❌ System Error",
+    "description": "An error occurred while processing your command. Please try again.",
+    "color": ERROR_COLOR.value,
+}
+
+# Template for the error shown when the user's database record could not be created
+DATABASE_ERROR = {
+    "type": "rich",
+    "title": "❌ Database Error",
+    "description": "Failed to create user record.",
+    "color": ERROR_COLOR.value,
+}
+
+# Template for the notice shown when a user has no attendance records yet
+NO_RECORDS_INFO = {
+    "type": "rich",
+    "title": "ℹ️ No Attendance Records",
+    "description": "You haven't recorded any attendance yet. Use `/clock-in` to get started!",
+    "color": INFO_COLOR.value,
+}
+
+# Template for the notice shown when no attendance types exist
+NO_TYPES_INFO = {
+    "type": "rich",
+    "title": "ℹ️ No Attendance Types",
+    "description": "No attendance types found in the system.",
+    "color": INFO_COLOR.value,
+}
+
+def build_system_error(
+    user: Optional[discord.User] = None,
+    description: Optional[str] = None,
+    template: Dict = SYSTEM_ERROR
+) -> discord.Embed:
+    """Create a system error embed from a shared template."""
+    return embed_from_template(template, user, description)
+
+def embed_from_template(
+    template: Dict,
+    user: Optional[discord.User] = None,
+    description: Optional[str] = None
+) -> discord.Embed:
+    """Create an embed from a shared template, adding the timestamp and author."""
+    embed = discord.Embed.from_dict(template)
+    if description:
+        embed.description = description
+    embed.timestamp = datetime.now(timezone.utc)
+    if user:
+        embed.set_author(name=user.display_name, icon_url=author_icon_url(user))
+    return embed
+
+async def send_response(interaction: discord.Interaction, **kwargs) -> None:
+    """Reply to an interaction directly, or as a followup once it has been deferred."""
+    lock = _ack_locks.get(interaction.id)
+    if lock is None:
+        lock = asyncio.Lock()
+    
+    # Hold the lock so a pending deferral cannot acknowledge the interaction mid-reply
+    async with lock:
+        if interaction.response.is_done():
+            await interaction.followup.send(**kwargs)
+        else:
+            await interaction.response.send_message(**kwargs)
+
+def safe_command(*, ephemeral: bool = False, error_message: Optional[str] = None):
+    """Decorate a cog command to reply with a system error on failure.
     
-    formatted = f"{record_type_display} - {timestamp}"
+    Commands answer with `send_response`. Fast ones reply directly; only those
+    still running after `DEFER_AFTER` seconds are deferred, so the 3 second
+    deadline is kept without spending an extra API call on every command.
+    Each invocation's latency is logged to spot regressions.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, interaction: discord.Interaction, *args, **kwargs):
+            start = time.perf_counter()
+            lock = _ack_locks[interaction.id] = asyncio.Lock()
+            deferred = False
+            
+            async def defer_if_slow() -> None:
+                nonlocal deferred
+                await asyncio.sleep(DEFER_AFTER)
+                async with lock:
+                    if interaction.response.is_done():
+                        return
+                    # Nobody awaits this task, so a failed defer has to be handled here
+                    try:
+                        await interaction.response.defer(ephemeral=ephemeral)
+                    except Exception as e:
+                        logger.warning("Could not defer /%s: %s", func.__name__, e)
+                        return
+                    deferred = True
+            
+            timer = asyncio.create_task(defer_if_slow())
+            try:
+                return await func(self, interaction, *args, **kwargs)
+            except Exception as e:
+                logger.exception("Error in %s command: %s", func.__name__, e)
+                embed = build_system_error(interaction.user, error_message)
+                await send_response(interaction, embed=embed, ephemeral=True)
+            finally:
+                timer.cancel()
+                _ack_locks.pop(interaction.id, None)
+                logger.info(
+                    "⏱️ /%s: total=%.0fms deferred=%s",
+                    func.__name__, (time.perf_counter() - start) * 1000, deferred
+                )
+        return wrapper
+    return decorator
+
+def user_cooldown(seconds: float, rate: int = 1):
+    """Decorate a cog command to allow each user at most `rate` invocations per `seconds`.
     
-    if attendance_type_name and record.record_type == "clock_in":
-        formatted += f" ({attendance_type_name})"
+    Apply it outside `safe_command` so rejected invocations are answered
+    directly, without deferring or touching the database.
+    """
+    def decorator(func):
+        # Each user's recent invocation times, oldest first
+        recent_uses: Dict[int, List[float]] = {}
+        last_pruned = time.monotonic()
+        
+        @functools.wraps(func)
+        async def wrapper(self, interaction: discord.Interaction, *args, **kwargs):
+            nonlocal recent_uses, last_pruned
+            now = time.monotonic()
+            
+            if now - last_pruned > COOLDOWN_PRUNE_INTERVAL:
+                recent_uses = {
+                    user_id: uses for user_id, uses in recent_uses.items()
+                    if now - uses[-1] < seconds
+                }
+                last_pruned = now
+            
+            uses = [ts for ts in recent_uses.get(interaction.user.id, ()) if now - ts < seconds]
+            if len(uses) >= rate:
+                embed = create_error_embed(
+                    "Slow Down",
+                    "Please wait a moment before using this command again.",
+                    interaction.user
+                )
+                await interaction.response.send_message(embed=embed, ephemeral=True)
+                return
+            
+            uses.append(now)
+            recent_uses[interaction.user.id] = uses
+            return await func(self, interaction, *args, **kwargs)
+        return wrapper
+    return decorator
+
+def validate_input(check):
+    """Decorate a cog command to reject invalid arguments before deferring.
     
-    if record.notes:
-        formatted += f"\n📝 {record.notes}"
+    `check` receives the command's arguments and returns a `(title, description)`
+    error pair, or None when they are valid. Apply it outside `safe_command` so
+    rejected input is answered directly, without an extra API round trip.
+    """
+    def decorator(func):
+        @functools.wraps(func)
+        async def wrapper(self, interaction: discord.Interaction, *args, **kwargs):
+            error = check(*args, **kwargs)
+            if error is not None:
+                title, description = error
+                embed = create_error_embed(title, description, interaction.user)
+                await interaction.response.send_message(embed=embed, ephemeral=True)
+                return
+            return await func(self, interaction, *args, **kwargs)
+        return wrapper
+    return decorator
+
+# Record type labels keyed by whether the record is a clock-in
+RECORD_TYPE_LABELS = {True: "🟢 Clock In", False: "🔴 Clock Out"}
+
+def format_attendance_record(record, attendance_type_name: Optional[str] = None) -> str:
+    """Format an attendance record for display."""
+    is_clock_in = record.record_type == "clock_in"
+    record_type_display = RECORD_TYPE_LABELS[is_clock_in]
+    timestamp = format_timestamp(record.timestamp) if record.timestamp else "Unknown time"
+    type_suffix = f" ({attendance_type_name})" if attendance_type_name and is_clock_in else ""
+    notes_suffix = f"\n📝 {record.notes}" if record.notes else ""
     
-    return formatted
+    return f"{record_type_display} - {timestamp}{type_suffix}{notes_suffix}"
 
 def truncate_text(text: str, max_length: int = 1000) -> str:
     """Truncate text to fit within Discord limits."""
@@ -101,40 +334,25 @@ def get_week_start_end(target_date: datetime, weeks_offset: int = 0) -> Tuple[da
     
     return week_start, week_end
 
-def calculate_work_hours(clock_in: datetime, clock_out: datetime) -> float:
-    """Calculate work hours between clock-in and clock-out."""
-    if not clock_in or not clock_out:
-        return 0.0
-    
-    duration = clock_out - clock_in
-    return duration.total_seconds() / 3600  # Convert to hours
-
-def format_duration(hours: float) -> str:
-    """Format duration in hours to human-readable string."""
-    if hours == 0:
-        return "0時間"
-    
-    total_minutes = int(hours * 60)
-    hours_part = total_minutes // 60
-    minutes_part = total_minutes % 60
+def format_duration(seconds: int) -> str:
+    """Format a duration in whole seconds to human-readable string."""
+    hours_part, remainder = divmod(seconds, 3600)
+    minutes_part = remainder // 60
     
     if minutes_part == 0:
         return f"{hours_part}時間"
-    else:
-        return f"{hours_part}時間{minutes_part}分"
+    return f"{hours_part}時間{minutes_part}分"
 
 def group_records_by_date(records: List[AttendanceRecord]) -> Dict[date, List[AttendanceRecord]]:
-    """Group attendance records by date."""
-    grouped = {}
+    """Group attendance records by date, keeping each day's records in input order."""
+    grouped: Dict[date, List[AttendanceRecord]] = defaultdict(list)
     
     for record in records:
         if record.timestamp:
-            record_date = record.timestamp.date()
-            if record_date not in grouped:
-                grouped[record_date] = []
-            grouped[record_date].append(record)
+            grouped[record.timestamp.date()].append(record)
     
-    return grouped
+    # Hand back a plain dict so lookups of empty days don't insert keys
+    return dict(grouped)
 
 def format_date_japanese(target_date: date) -> str:
     """Format date in Japanese style."""
@@ -142,24 +360,3 @@ def format_date_japanese(target_date: date) -> str:
     weekday = weekdays[target_date.weekday()]
     return f"{target_date.month}/{target_date.day}({weekday})"
 
-def calculate_daily_work_hours(day_records: List[AttendanceRecord]) -> Tuple[float, bool]:
-    """Calculate work hours for a single day and check for incomplete sessions."""
-    total_hours = 0.0
-    has_incomplete = False
-    
-    # Sort records by timestamp
-    sorted_records = sorted(day_records, key=lambda r: r.timestamp or datetime.min)
-    
-    clock_in_time = None
-    for record in sorted_records:
-        if record.record_type == "clock_in":
-            clock_in_time = record.timestamp
-        elif record.record_type == "clock_out" and clock_in_time and record.timestamp:
-            total_hours += calculate_work_hours(clock_in_time, record.timestamp)
-            clock_in_time = None
-    
-    # Check if there's an incomplete session (clock-in without clock-out)
-    if clock_in_time is not None:
-        has_incomplete = True
-    
-    return total_hours, has_incomplete
@@ -2,86 +2,130 @@
 
 import asyncio
 import sys
-import os
-
-# Add the bot directory to the path
-sys.path.append(os.path.dirname(os.path.abspath(__file__)))
+from datetime import datetime, timedelta
 
 from bot.database import Database
-from bot.models import User, AttendanceType
+from bot.models import User, AttendanceType, ClockStatus
 from bot.config import Config
 
+def check(ok: bool, message: str) -> None:
+    """Print a check's result line and fail the run if the check did not pass."""
+    print(f"{'✅' if ok else '❌'} {message}")
+    if not ok:
+        raise AssertionError(message)
+
 async def test_database():
     """Test database functionality."""
     print("🧪 Testing database functionality...")
     
-    # Initialize database
-    db = Database("test_attendance.db")
+    # Initialize database; a shared in-memory database keeps the test off the disk
+    db = Database("file:test_attendance?mode=memory&cache=shared")
     await db.init_database()
+    try:
+        await check_database(db)
+    finally:
+        # Close even after a failed check; open connection threads would keep the script alive
+        await db.close()
     
+    print("🎉 All database tests passed!")
+
+async def check_database(db: Database) -> None:
+    """Run the database checks against an initialized database."""
     print("✅ Database initialized successfully")
     
     # Test user creation
     user = await db.get_or_create_user("123456789", "TestUser")
-    print(f"✅ Created user: {user.username} (ID: {user.id})")
-    
-    # Ensure user ID is valid
-    if user.id is None:
-        print("❌ Failed to create user with valid ID")
-        return
+    check(user.id is not None, f"Created user: {user.username} (ID: {user.id})")
     
     # Test attendance types
     attendance_types = await db.get_attendance_types()
-    print(f"✅ Found {len(attendance_types)} attendance types:")
-    for at in attendance_types:
-        print(f"   - {at.type_name}: {at.description}")
+    type_lines = "".join(f"\n   - {at.type_name}: {at.description}" for at in attendance_types)
+    print(f"✅ Found {len(attendance_types)} attendance types:{type_lines}")
+    
+    # Test batched attendance type name lookup
+    if attendance_types:
+        type_ids = [at.id for at in attendance_types]
+        type_names = await db.get_attendance_type_names(type_ids)
+        check(
+            type_names == {at.id: at.type_name for at in attendance_types},
+            f"Attendance types {type_ids} resolve to: {list(type_names.values())}"
+        )
+        by_name = await db.get_attendance_type_by_name(attendance_types[0].type_name)
+        print(f"✅ Attendance type '{attendance_types[0].type_name}' looked up by name: {by_name.id if by_name else None}")
     
     # Test clock-in validation
     can_clock_in, reason = await db.can_clock_in(user.id)
     print(f"✅ Can clock in: {can_clock_in} ({reason})")
     
-    # Test attendance record creation
+    # Test attendance record creation, clock-in and clock-out in one batch
     if can_clock_in and attendance_types:
-        record = await db.create_attendance_record(
-            user.id,
-            "clock_in",
-            attendance_types[0].id,
-            "Test clock-in"
-        )
-        print(f"✅ Created clock-in record: {record.id}")
+        records = await db.bulk_create_attendance_records([
+            (user.id, "clock_in", attendance_types[0].id, "Test clock-in"),
+            (user.id, "clock_out", None, "Test clock-out"),
+        ])
+        print(f"✅ Created clock-in/clock-out records: {[record.id for record in records]}")
         
-        # Test clock-out validation
+        # The batch ended with a clock-out, so the user must be left clocked out
         can_clock_out, reason = await db.can_clock_out(user.id)
-        print(f"✅ Can clock out: {can_clock_out} ({reason})")
+        check(not can_clock_out, f"User left clocked out after the batch: can clock out {can_clock_out} ({reason})")
+    
+    # Test single-transaction clock-in
+    result = await db.clock_in_tx("123456789", "TestUser", "Unknown Type")
+    check(result.status == ClockStatus.UNKNOWN_TYPE, f"Clock-in with unknown type rejected: {result.status.value} ({result.reason})")
+    
+    # Test single-transaction clock-out
+    result = await db.clock_out_tx("123456789", "TestUser")
+    check(result.status == ClockStatus.NOT_IN, f"Clock-out while clocked out rejected: {result.status.value} ({result.reason})")
+    
+    # Test clock-in and clock-out where validation and insert share one transaction
+    if attendance_types:
+        result = await db.clock_in_tx("123456789", "TestUser", attendance_types[0].type_name, "Test clock-in")
+        check(result.status == ClockStatus.OK, f"Clocked in: {result.status.value} (record {result.record.id if result.record else None})")
+        result = await db.clock_in_tx("123456789", "TestUser", attendance_types[0].type_name)
+        check(result.status == ClockStatus.ALREADY_IN, f"Second clock-in rejected: {result.status.value} ({result.reason})")
+        result = await db.clock_out_tx("123456789", "TestUser", "Test clock-out")
+        check(result.status == ClockStatus.OK, f"Clocked out: {result.status.value} (record {result.record.id if result.record else None})")
         
-        if can_clock_out:
-            record = await db.create_attendance_record(
-                user.id,
-                "clock_out",
-                None,
-                "Test clock-out"
-            )
-            print(f"✅ Created clock-out record: {record.id}")
+        # Test standalone record creation and the latest record lookup
+        record = await db.create_attendance_record(user.id, "clock_in", attendance_types[0].id, "Test clock-in")
+        latest = await db.get_latest_record(user.id)
+        check(latest is not None and latest.id == record.id, f"Latest record is the new clock-in: {latest.id if latest else None}")
+        record = await db.create_attendance_record(user.id, "clock_out", None, "Test clock-out")
+        print(f"✅ Created clock-out record: {record.id}")
+    
+    # Test the read paths; they are independent, so they run concurrently on the read pool
+    now = datetime.now()
+    week_start, week_end = now - timedelta(days=7), now + timedelta(days=1)
+    summary, records, records_with_types, (fused_summary, recent), (daily, type_counts), week = await asyncio.gather(
+        db.get_user_attendance_summary(user.id),
+        db.get_user_records(user.id, limit=5),
+        db.get_user_records_with_type_name(user.id, limit=5),
+        db.get_summary_with_recent_records(user.id, limit=5),
+        db.get_weekly_aggregates(user.id, week_start, week_end),
+        db.get_weekly_records_with_aggregates(user.id, week_start, week_end)
+    )
     
     # Test summary
-    summary = await db.get_user_attendance_summary(user.id)
     if summary:
         print(f"✅ User summary: {summary.total_records} records, currently clocked in: {summary.is_currently_clocked_in}")
     
     # Test records retrieval
-    records = await db.get_user_records(user.id, limit=5)
     print(f"✅ Retrieved {len(records)} recent records")
     
-    await db.close()
+    # Test records retrieval with attendance type names
+    type_names = [type_name for _, type_name in records_with_types]
+    print(f"✅ Retrieved {len(records_with_types)} recent records with types: {type_names}")
     
-    # Clean up test database
-    try:
-        os.remove("test_attendance.db")
-        print("✅ Cleaned up test database")
-    except:
-        pass
+    # Test fused summary and recent records retrieval
+    print(f"✅ Retrieved summary ({fused_summary.total_records if fused_summary else 0} records) with {len(recent)} recent records")
     
-    print("🎉 All database tests passed!")
+    # Test weekly aggregates computed in SQL
+    print(f"✅ Weekly aggregates: {len(daily)} days, clock-ins per type: {type_counts}")
+    print(f"✅ Retrieved {len(week[0])} weekly records with {len(week[1])} day totals from one snapshot")
+    
+    # Test connection pool reuse
+    stats = db.get_pool_stats()
+    print(f"✅ Pool stats: {stats['open']} connections opened for {stats['acquired']} acquisitions")
 
 def test_config():
     """Test configuration."""
@@ -117,6 +161,13 @@ async def main():
     print("3. Test the slash commands in your Discord server")
 
 if __name__ == "__main__":
+    # uvloop is optional; use it for the test run when it is installed
+    try:
+        import uvloop
+        asyncio.set_event_loop_policy(uvloop.EventLoopPolicy())
+    except ImportError:
+        pass
+    
     try:
         asyncio.run(main())
     except Exception as e: